@@ -0,0 +1,220 @@
+# analysis/replay_stats.py
+"""Streaming statistics over replay archives.
+
+Games are replayed through the Rules engine as a generator pipeline
+(games -> rounds -> fixed-size NumPy chunks) and folded into fixed-size
+histograms, so memory use does not grow with the archive. The archive is
+split into block ranges that worker processes aggregate independently; the
+partial results are merged at the end.
+
+Example:
+    python -m analysis.replay_stats games.skr --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from game.replay import ReplayReader
+
+MAX_PLAYERS = 4
+MAX_ROUND = 32  # Later rounds are counted in the last bucket
+MIN_SCORE = -50  # Round score histogram range
+MAX_SCORE = 300
+MAX_LENGTH = 512  # Round length histogram range, in actions
+CHUNK_ROWS = 65536  # Rounds per NumPy chunk
+SHARDS_PER_WORKER = 4
+
+# Columns of a chunk row
+ROUND, PLAYERS, LENGTH, DOUBLED, REMOVALS, TRIGGER_SCORE = range(6)
+SCORES = 6  # Per-seat round scores follow, padded with NO_SCORE
+ROW_WIDTH = SCORES + MAX_PLAYERS
+NO_SCORE = np.iinfo(np.int32).min
+
+
+def iter_rounds(replays):
+    """Yield one row per completed round of every replay"""
+    for replay in replays:
+        rounds = []
+        counters = {"actions": 0, "removals": 0}
+
+        def on_event(event, **data):
+            if event == "remove_column":
+                counters["removals"] += 1
+            elif event == "round_end":
+                # Emitted by the action that ends the round, before that action is reported
+                scores = data["scores"] + [NO_SCORE] * (MAX_PLAYERS - len(data["scores"]))
+                rounds.append([
+                    data["round_number"], len(data["scores"]), counters["actions"] + 1,
+                    data["doubled"], counters["removals"], data["scores"][data["trigger"]],
+                ] + scores[:MAX_PLAYERS])
+            elif event == "action":
+                if data["action"] == "start_new_round":
+                    counters["actions"] = 0
+                    counters["removals"] = 0
+                else:
+                    counters["actions"] += 1
+
+        rules = replay.new_rules()
+        rules.add_listener(on_event)
+        for action in replay.actions():
+            replay.apply(rules, action)
+            yield from rounds
+            rounds.clear()
+
+
+def iter_chunks(rows, size=CHUNK_ROWS):
+    """Pack rows into int32 arrays of at most `size` rows"""
+    chunk = np.empty((size, ROW_WIDTH), dtype=np.int32)
+    filled = 0
+    for row in rows:
+        chunk[filled] = row
+        filled += 1
+        if filled == size:
+            yield chunk
+            chunk = np.empty((size, ROW_WIDTH), dtype=np.int32)
+            filled = 0
+    if filled:
+        yield chunk[:filled]
+
+
+class ReplayStats:
+    """Fixed-size aggregates that can be filled from chunks and merged"""
+
+    def __init__(self):
+        score_bins = MAX_SCORE - MIN_SCORE + 1
+        self.games = 0
+        self.rounds = np.zeros(MAX_ROUND + 1, dtype=np.int64)  # Rounds per round number
+        self.scores = np.zeros((MAX_ROUND + 1, score_bins), dtype=np.int64)  # Score histogram per round number
+        self.lengths = np.zeros(MAX_LENGTH + 1, dtype=np.int64)  # Round length histogram
+        self.removals = np.zeros(13, dtype=np.int64)  # Column removals per round histogram
+        self.doubled = 0  # Rounds where the trigger player was doubled
+        self.doubled_by_players = np.zeros(MAX_PLAYERS + 1, dtype=np.int64)
+        self.rounds_by_players = np.zeros(MAX_PLAYERS + 1, dtype=np.int64)
+
+    def add_chunk(self, chunk):
+        """Fold a chunk of round rows into the aggregates"""
+        round_number = np.minimum(chunk[:, ROUND], MAX_ROUND)
+        self.rounds += np.bincount(round_number, minlength=MAX_ROUND + 1)
+        self.lengths += np.bincount(np.minimum(chunk[:, LENGTH], MAX_LENGTH), minlength=MAX_LENGTH + 1)
+        self.removals += np.bincount(np.minimum(chunk[:, REMOVALS], 12), minlength=13)
+        doubled = chunk[:, DOUBLED] != 0
+        self.doubled += int(doubled.sum())
+        self.rounds_by_players += np.bincount(chunk[:, PLAYERS], minlength=MAX_PLAYERS + 1)
+        self.doubled_by_players += np.bincount(chunk[doubled, PLAYERS], minlength=MAX_PLAYERS + 1)
+
+        scores = chunk[:, SCORES:]
+        present = scores != NO_SCORE
+        rows = np.broadcast_to(round_number[:, None], scores.shape)[present]
+        bins = np.clip(scores[present], MIN_SCORE, MAX_SCORE) - MIN_SCORE
+        np.add.at(self.scores, (rows, bins), 1)
+
+    def merge(self, other):
+        """Add the aggregates of another ReplayStats"""
+        self.games += other.games
+        self.rounds += other.rounds
+        self.scores += other.scores
+        self.lengths += other.lengths
+        self.removals += other.removals
+        self.doubled += other.doubled
+        self.doubled_by_players += other.doubled_by_players
+        self.rounds_by_players += other.rounds_by_players
+        return self
+
+    def summary(self):
+        """Headline numbers as a plain dict"""
+        total_rounds = int(self.rounds.sum())
+        values = np.arange(MIN_SCORE, MAX_SCORE + 1)
+        per_round = {}
+        for round_number in range(1, MAX_ROUND + 1):
+            histogram = self.scores[round_number]
+            count = int(histogram.sum())
+            if count:
+                mean = float((histogram * values).sum() / count)
+                cumulative = np.cumsum(histogram)
+                per_round[round_number] = {
+                    "count": count,
+                    "mean": mean,
+                    "std": float(np.sqrt((histogram * (values - mean) ** 2).sum() / count)),
+                    "median": int(values[np.searchsorted(cumulative, count / 2)]),
+                }
+        lengths = np.arange(MAX_LENGTH + 1)
+        return {
+            "games": self.games,
+            "rounds": total_rounds,
+            "avg_rounds_per_game": total_rounds / self.games if self.games else 0.0,
+            "avg_round_length": float((self.lengths * lengths).sum() / total_rounds) if total_rounds else 0.0,
+            "trigger_doubled_rate": self.doubled / total_rounds if total_rounds else 0.0,
+            "trigger_doubled_rate_by_players": {
+                players: int(self.doubled_by_players[players]) / int(self.rounds_by_players[players])
+                for players in range(2, MAX_PLAYERS + 1) if self.rounds_by_players[players]
+            },
+            "avg_column_removals": float((self.removals * np.arange(13)).sum() / total_rounds) if total_rounds else 0.0,
+            "score_by_round": per_round,
+        }
+
+
+def analyze_blocks(path, start_block, end_block):
+    """Aggregate a range of blocks of an archive"""
+    stats = ReplayStats()
+    with ReplayReader(path) as reader:
+        def counted(replays):
+            for replay in replays:
+                stats.games += 1
+                yield replay
+
+        for chunk in iter_chunks(iter_rounds(counted(reader.games(start_block, end_block)))):
+            stats.add_chunk(chunk)
+    return stats
+
+
+def _analyze_shard(shard):
+    return analyze_blocks(*shard)
+
+
+def analyze(path, workers=None):
+    """Aggregate a whole archive, sharded by blocks over worker processes"""
+    workers = workers or os.cpu_count() or 1
+    with ReplayReader(path) as reader:
+        blocks = reader.block_count
+    shard_count = max(1, min(blocks, workers * SHARDS_PER_WORKER))
+    bounds = [blocks * i // shard_count for i in range(shard_count + 1)]
+    shards = [(path, bounds[i], bounds[i + 1]) for i in range(shard_count)]
+
+    stats = ReplayStats()
+    if workers <= 1:
+        for shard in shards:
+            stats.merge(_analyze_shard(shard))
+        return stats
+    with multiprocessing.Pool(workers) as pool:
+        for partial in pool.imap_unordered(_analyze_shard, shards):
+            stats.merge(partial)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistics over a Skyjo replay archive")
+    parser.add_argument("archive")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    summary = analyze(args.archive, args.workers).summary()
+    print(f"Games: {summary['games']}  Rounds: {summary['rounds']}  "
+          f"Rounds per game: {summary['avg_rounds_per_game']:.2f}")
+    print(f"Average round length: {summary['avg_round_length']:.1f} actions")
+    print(f"Trigger player doubled: {summary['trigger_doubled_rate']:.1%} of rounds")
+    for players, rate in summary["trigger_doubled_rate_by_players"].items():
+        print(f"  {players} players: {rate:.1%}")
+    print(f"Column removals per round: {summary['avg_column_removals']:.3f}")
+    print("Round score by round number:")
+    for round_number, row in summary["score_by_round"].items():
+        print(f"  {round_number:>2}: n={row['count']:<8} mean={row['mean']:6.2f} "
+              f"std={row['std']:6.2f} median={row['median']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
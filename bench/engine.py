@@ -0,0 +1,164 @@
+# bench/engine.py
+"""Benchmarks of the game engine hot paths, on seeded game states"""
+import json
+import pickle
+import time
+
+from bench.harness import benchmark
+from bots.policies import GreedyPolicy
+from bots.simulate import play_game
+from game.rules import Rules
+
+SEED = 1234
+COPY_BATCH = 1000  # Game copies prepared at a time for handler benchmarks
+HANDLER_OPS = 10000  # Cap on copies per handler measurement
+
+
+def seeded_game(players=2, seed=SEED):
+    """A started game in the initial card selection"""
+    rules = Rules(seed)
+    for i in range(players):
+        rules.add_player(f"P{i}")
+    rules.start_game()
+    return rules
+
+
+def mid_game(players=2, turns=None, seed=SEED):
+    """A seeded game some turns into the first round, waiting at choose_pile"""
+    rules = seeded_game(players, seed)
+    policies = [GreedyPolicy(seed + i) for i in range(players)]
+    turns = 3 * players if turns is None else turns
+    while not (rules.board.state == "playing" and rules.board.phase == "choose_pile" and turns <= 0):
+        if rules.board.state == "playing" and rules.board.phase == "choose_pile":
+            turns -= 1
+        name = rules.get_current_player_name()
+        action, row, col = policies[rules.board.current_player_index].choose(rules, name)
+        rules.handle_action(name, action, row, col)
+    return rules
+
+
+def _hidden_cell(rules):
+    player = rules.board.get_current_player()
+    for r in range(3):
+        for c in range(4):
+            if player.grid[r][c] is not None and not player.revealed[r][c]:
+                return r, c
+    raise RuntimeError("no face-down card left")
+
+
+def _time_on_copies(prototype, call, number):
+    """Time call(rules) on fresh copies of a game, excluding the copying"""
+    data = pickle.dumps(prototype)
+    elapsed = 0.0
+    done = 0
+    while done < number:
+        copies = [pickle.loads(data) for _ in range(min(COPY_BATCH, number - done))]
+        start = time.perf_counter()
+        for rules in copies:
+            call(rules)
+        elapsed += time.perf_counter() - start
+        done += len(copies)
+    return elapsed
+
+
+def _handler_benchmark(name, prepare, call):
+    """Register a benchmark of one Rules.handle_* call on a prepared state"""
+    state = {}
+
+    def run(number):
+        if "prototype" not in state:
+            state["prototype"] = prepare()
+        return _time_on_copies(state["prototype"], call, number)
+
+    benchmark(name, HANDLER_OPS)(run)
+
+
+def _at_decide_card():
+    rules = mid_game()
+    rules.handle_draw_pile_action(rules.get_current_player_name())
+    return rules
+
+
+def _at_swap_card():
+    rules = _at_decide_card()
+    rules.handle_keep_card_action(rules.get_current_player_name())
+    return rules
+
+
+def _at_flip_card():
+    rules = _at_decide_card()
+    rules.handle_discard_drawn_card_action(rules.get_current_player_name())
+    return rules
+
+
+_handler_benchmark("handle_initial_card_selection", seeded_game,
+                   lambda rules: rules.handle_initial_card_selection("P0", 0, 0))
+_handler_benchmark("handle_draw_pile_action", mid_game,
+                   lambda rules: rules.handle_draw_pile_action(rules.get_current_player_name()))
+_handler_benchmark("handle_discard_pile_action", mid_game,
+                   lambda rules: rules.handle_discard_pile_action(rules.get_current_player_name()))
+_handler_benchmark("handle_keep_card_action", _at_decide_card,
+                   lambda rules: rules.handle_keep_card_action(rules.get_current_player_name()))
+_handler_benchmark("handle_discard_drawn_card_action", _at_decide_card,
+                   lambda rules: rules.handle_discard_drawn_card_action(rules.get_current_player_name()))
+_handler_benchmark("handle_card_swap", _at_swap_card,
+                   lambda rules: rules.handle_card_swap(rules.get_current_player_name(), *_hidden_cell(rules)))
+_handler_benchmark("handle_card_flip", _at_flip_card,
+                   lambda rules: rules.handle_card_flip(rules.get_current_player_name(), *_hidden_cell(rules)))
+
+
+def _state_view_benchmark(players):
+    state = {}
+
+    @benchmark(f"game_state_json_{players}p")
+    def run(number):
+        if "rules" not in state:
+            state["rules"] = mid_game(players)
+        rules = state["rules"]
+        names = [player.name for player in rules.board.players]
+        start = time.perf_counter()
+        for i in range(number):
+            # Past the view cache: building and encoding a view as after every change
+            json.dumps(rules._build_state_for_player(names[i % players]))
+        return time.perf_counter() - start
+
+    @benchmark(f"game_state_encoded_cached_{players}p")
+    def run_cached(number):
+        if "rules" not in state:
+            state["rules"] = mid_game(players)
+        rules = state["rules"]
+        names = [player.name for player in rules.board.players]
+        start = time.perf_counter()
+        for i in range(number):
+            rules.get_encoded_state_for_player(names[i % players])
+        return time.perf_counter() - start
+
+
+for _players in (2, 4):
+    _state_view_benchmark(_players)
+
+
+@benchmark("player_check_all_columns")
+def bench_check_all_columns(number):
+    player = mid_game().board.players[0]
+    start = time.perf_counter()
+    for _ in range(number):
+        player.check_all_columns()
+    return time.perf_counter() - start
+
+
+@benchmark("player_get_revealed_score")
+def bench_get_revealed_score(number):
+    player = mid_game().board.players[0]
+    start = time.perf_counter()
+    for _ in range(number):
+        player.get_revealed_score()
+    return time.perf_counter() - start
+
+
+@benchmark("simulate_full_game_2p")
+def bench_full_game(number):
+    start = time.perf_counter()
+    for i in range(number):
+        play_game([GreedyPolicy(i), GreedyPolicy(i + 1)], SEED + i)
+    return time.perf_counter() - start
@@ -0,0 +1,152 @@
+# bench/harness.py
+"""Benchmark harness: registry, timing, baselines and regression report.
+
+Benchmarks register with @benchmark and take the number of operations to
+time, returning the elapsed seconds for exactly those operations (setup
+excluded). The harness calibrates the operation count, repeats the
+measurement and keeps the fastest repeat, which is the most stable number
+on a noisy machine.
+
+Example:
+    python -m bench --save main            # record a baseline
+    python -m bench --compare main         # compare against it
+    python -m bench --filter handle_ -v
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+MIN_TIME = 0.2  # Seconds a single repeat should take at least
+REPEATS = 5
+THRESHOLD = 0.10  # Relative slowdown reported as a regression
+
+BENCHMARKS = {}
+
+
+def benchmark(name, max_number=None):
+    """Register a benchmark function taking the number of operations to time"""
+    def register(func):
+        BENCHMARKS[name] = (func, max_number)
+        return func
+    return register
+
+
+def _load_cases():
+    # Importing the case modules registers their benchmarks
+    from bench import engine, network, render  # noqa: F401
+
+
+def measure(func, max_number=None, min_time=MIN_TIME, repeats=REPEATS):
+    """Return per-operation times of the repeats, in seconds"""
+    number = 1
+    while True:
+        elapsed = func(number)
+        if elapsed >= min_time or (max_number and number >= max_number):
+            break
+        number = number * 10 if elapsed < min_time / 10 else number * 2
+        if max_number:
+            number = min(number, max_number)
+    times = [elapsed / number]
+    for _ in range(repeats - 1):
+        times.append(func(number) / number)
+    return times
+
+
+def run(pattern="*", verbose=False):
+    """Run the matching benchmarks and return {name: result}"""
+    _load_cases()
+    results = {}
+    for name, (func, max_number) in BENCHMARKS.items():
+        if not fnmatch.fnmatch(name, pattern) and pattern not in name:
+            continue
+        times = measure(func, max_number)
+        results[name] = {"best": min(times), "median": statistics.median(times)}
+        if verbose:
+            print(f"{name:<40} {_format_time(min(times)):>12}")
+    return results
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def baseline_path(name):
+    if os.sep in name or name.endswith(".json"):
+        return name
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name, results):
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(name):
+    with open(baseline_path(name)) as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Print a comparison table and return the names that regressed"""
+    regressions = []
+    print(f"{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<40} {'-':>12} {_format_time(result['best']):>12} {'new':>8}")
+            continue
+        old = baseline[name]["best"]
+        change = result["best"] / old - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<40} {_format_time(old):>12} {_format_time(result['best']):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Skyjo benchmarks")
+    parser.add_argument("--filter", default="*", help="glob or substring of benchmark names")
+    parser.add_argument("--save", metavar="NAME", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative slowdown counted as a regression (default 0.10)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        _load_cases()
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    results = run(args.filter, args.verbose or not args.compare)
+    if args.save:
+        print(f"Saved baseline to {save_baseline(args.save, results)}")
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+    return 0
@@ -0,0 +1,126 @@
+# bench/network.py
+"""Server round trip: action in, broadcast state out, over each transport"""
+import contextlib
+import io
+import json
+import queue
+import threading
+import time
+
+from bench.harness import benchmark
+from bench.engine import SEED
+from bots.policies import GreedyPolicy
+from game.rules import Rules
+from net import server
+from net.transport import connect, default_unix_path, listen, unix_sockets_supported
+
+ROUND_TRIP_OPS = 2000  # Actions per measurement
+UNLIMITED = (1e9, 1e9)  # Rate limits that never trigger but are still checked
+_listeners = {}
+
+
+class _BenchClient:
+    """A raw transport client that queues every newline-delimited message"""
+
+    def __init__(self, address):
+        self.conn = connect(address)
+        self.messages = queue.Queue()
+
+    def start_reading(self):
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        buffer = b""
+        while True:
+            try:
+                data = self.conn.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                self.messages.put(line)
+
+
+def _listen(address):
+    """Serve the real server module on an address in this process"""
+    if address not in _listeners:
+        _listeners[address] = listen(address)
+        threading.Thread(target=server.serve, args=(_listeners[address],), daemon=True).start()
+    return _listeners[address].address
+
+
+def _join(address, name, count=None):
+    client = _BenchClient(address)
+    client.conn.recv(1024)
+    if count is not None:
+        client.conn.sendall(str(count).encode())
+        time.sleep(0.05)  # The server reads the count and the name with separate recv calls
+    client.conn.sendall(name.encode())
+    while name not in server.table.player_names:
+        time.sleep(0.001)
+    client.start_reading()
+    return client
+
+
+def _fresh_game(address):
+    """Reset the server's game and seat two benchmark clients"""
+    server.table = server.GameTable(rules=Rules(SEED), rate_limit=UNLIMITED, table_rate_limit=UNLIMITED)
+    clients = [_join(address, "P0", 2), _join(address, "P1")]
+    for client in clients:
+        client.messages.get(timeout=5)  # Initial state
+    return clients
+
+
+def _round_trips(address, number):
+    """Time `number` actions from send to the sender receiving the new state"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        address = _listen(address)
+        clients = _fresh_game(address)
+        policies = [GreedyPolicy(SEED), GreedyPolicy(SEED + 1)]
+        elapsed = 0.0
+        done = 0
+        while done < number:
+            rules = server.table.rules
+            if rules.board.state == "game_over":
+                for client in clients:
+                    client.conn.close()
+                clients = _fresh_game(address)
+                continue
+            seat = rules.board.current_player_index
+            name = rules.get_current_player_name()
+            action, row, col = policies[seat].choose(rules, name)
+            message = {"action": action}
+            if row is not None:
+                message["row"] = row
+                message["col"] = col
+            start = time.perf_counter()
+            clients[seat].conn.sendall(json.dumps(message).encode())
+            clients[seat].messages.get(timeout=5)
+            elapsed += time.perf_counter() - start
+            done += 1
+            # Wait for everyone's copy of the broadcast so the next action starts clean
+            for other in clients:
+                if other is not clients[seat]:
+                    other.messages.get(timeout=5)
+        for client in clients:
+            client.conn.close()
+    return elapsed
+
+
+@benchmark("server_round_trip_tcp", ROUND_TRIP_OPS)
+def bench_round_trip_tcp(number):
+    return _round_trips("tcp://localhost:0", number)
+
+
+@benchmark("server_round_trip_loopback", ROUND_TRIP_OPS)
+def bench_round_trip_loopback(number):
+    return _round_trips("loopback://bench", number)
+
+
+if unix_sockets_supported():
+    @benchmark("server_round_trip_unix", ROUND_TRIP_OPS)
+    def bench_round_trip_unix(number):
+        return _round_trips(f"unix://{default_unix_path(0)}", number)
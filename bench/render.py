@@ -0,0 +1,156 @@
+# bench/render.py
+"""Frame times of the pygame client, headless, on recorded game states.
+
+The window is opened on SDL's dummy video driver unless SDL_VIDEODRIVER
+says otherwise, so these run without a display. Each case replays the
+views one player received during a seeded bot game, one state per frame:
+full redraws split into the parts of ui/screen.py (player grids, game
+info, centre piles, buttons), and the incremental Renderer the client
+uses. Times are per frame.
+"""
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from bench.harness import benchmark
+from bench.engine import SEED
+from bots.policies import GreedyPolicy
+from game.rules import Rules
+from ui.buttons import Button
+from ui.cards import load_cards
+from ui.layout import CARD_HEIGHT, CARD_WIDTH, GRID_COLS, GRID_ROWS, get_layout
+from ui.renderer import Renderer
+from ui.screen import (
+    DARK_GREEN, current_player_name, draw_card_cell, draw_center_area, draw_game_info, draw_held_card,
+    draw_player_panel, grid_cell
+)
+
+CARDS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "cards")
+VIEWER = "P0"
+RECORDED_FRAMES = 300  # States kept from the start of each recorded game
+PLAYER_COUNTS = (2, 3, 4)
+SIZES = ((800, 600), (1200, 700), (1920, 1080))
+PARTS_SIZE = (1200, 700)  # Window size of the per-part cases
+BUTTON_LABELS = ("Keep Card", "Discard Card")
+_recordings = {}
+_cards = None
+
+
+def recorded_states(players):
+    """The views VIEWER received while bots played a seeded game, in order"""
+    if players not in _recordings:
+        rules = Rules(SEED)
+        for i in range(players):
+            rules.add_player(f"P{i}")
+        rules.start_game()
+        policies = [GreedyPolicy(SEED + i) for i in range(players)]
+        states = [rules.get_game_state_for_player(VIEWER)]
+        while rules.board.state != "game_over" and len(states) < RECORDED_FRAMES:
+            name = rules.get_current_player_name()
+            action, row, col = policies[rules.board.current_player_index].choose(rules, name)
+            rules.handle_action(name, action, row, col)
+            states.append(rules.get_game_state_for_player(VIEWER))
+        _recordings[players] = states
+    return _recordings[players]
+
+
+def _window(size):
+    """The display surface at size, and the card images converted for it"""
+    global _cards
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode(size)
+    if _cards is None:
+        # Loaded once the display exists, so the atlas is in its format
+        _cards = load_cards(CARDS_PATH, CARD_WIDTH, CARD_HEIGHT)
+    return screen, _cards
+
+
+def _buttons(layout):
+    return [Button(*rect, label, lambda: None) for rect, label in zip(layout.buttons, BUTTON_LABELS)]
+
+
+def _part(players, size, draw):
+    """Time draw(screen, cards, state, buttons) over `number` recorded frames"""
+    def run(number):
+        screen, cards = _window(size)
+        states = recorded_states(players)
+        buttons = _buttons(get_layout(size, players))
+        screen.fill(DARK_GREEN)
+        start = time.perf_counter()
+        for i in range(number):
+            draw(screen, cards, states[i % len(states)], buttons)
+        return time.perf_counter() - start
+    return run
+
+
+def _draw_grids(screen, cards, state, buttons):
+    """Every player's panel and cards, drawn as the Renderer draws them"""
+    players = state["players"]
+    layout = get_layout(screen.get_size(), len(players))
+    scaled = cards.scaled(layout.scale)
+    turn_name = current_player_name(state)
+    for idx, (name, data) in enumerate(players.items()):
+        x, y = layout.origins[idx]
+        is_turn = name == turn_name
+        draw_player_panel(screen, name, data, x, y, name == VIEWER, is_turn, layout.scale)
+        for row in range(GRID_ROWS):
+            for col in range(GRID_COLS):
+                value, revealed = grid_cell(data, row, col)
+                card_x, card_y = layout.card_position(idx, row, col)
+                draw_card_cell(screen, scaled, value, revealed, card_x, card_y, is_turn)
+
+
+def _draw_info(screen, cards, state, buttons):
+    draw_game_info(screen, state, VIEWER)
+
+
+def _draw_center(screen, cards, state, buttons):
+    draw_center_area(screen, state, cards)
+    draw_held_card(screen, state, cards)
+
+
+def _draw_buttons(screen, cards, state, buttons):
+    for button in buttons:
+        button.draw(screen)
+
+
+def _draw_frame(screen, cards, state, buttons):
+    """A full redraw, as the client did before the Renderer"""
+    screen.fill(DARK_GREEN)
+    _draw_grids(screen, cards, state, buttons)
+    _draw_info(screen, cards, state, buttons)
+    _draw_center(screen, cards, state, buttons)
+    _draw_buttons(screen, cards, state, buttons)
+    pygame.display.flip()
+
+
+def _incremental(players, size):
+    """Time the Renderer over `number` recorded frames, repainting what changed"""
+    def run(number):
+        screen, cards = _window(size)
+        states = recorded_states(players)
+        buttons = _buttons(get_layout(size, players))
+        renderer = Renderer(screen, cards)
+        renderer.draw(states[-1], VIEWER, buttons)
+        start = time.perf_counter()
+        for i in range(number):
+            renderer.draw(states[i % len(states)], VIEWER, buttons)
+        return time.perf_counter() - start
+    return run
+
+
+for _players in PLAYER_COUNTS:
+    for _size in SIZES:
+        _suffix = f"{_players}p_{_size[0]}x{_size[1]}"
+        benchmark(f"render_frame_{_suffix}")(_part(_players, _size, _draw_frame))
+        benchmark(f"render_incremental_{_suffix}")(_incremental(_players, _size))
+    _suffix = f"{_players}p_{PARTS_SIZE[0]}x{PARTS_SIZE[1]}"
+    benchmark(f"render_player_grids_{_suffix}")(_part(_players, PARTS_SIZE, _draw_grids))
+    benchmark(f"render_game_info_{_suffix}")(_part(_players, PARTS_SIZE, _draw_info))
+    benchmark(f"render_center_area_{_suffix}")(_part(_players, PARTS_SIZE, _draw_center))
+    benchmark(f"render_buttons_{_suffix}")(_part(_players, PARTS_SIZE, _draw_buttons))
@@ -0,0 +1,5 @@
+# bots/__init__.py
+from .policies import GreedyPolicy, Policy, RandomPolicy, legal_actions, load_policy
+from .simulate import play_game
+
+__all__ = ['GreedyPolicy', 'Policy', 'RandomPolicy', 'legal_actions', 'load_policy', 'play_game']
@@ -0,0 +1,143 @@
+# bots/policies.py
+import importlib
+import random
+
+
+def legal_actions(rules, player_name):
+    """List the (action, row, col) tuples the player may send right now"""
+    board = rules.board
+    if board.state == "round_end":
+        return [("start_new_round", None, None)]
+    if rules.get_current_player_name() != player_name:
+        return []
+    player = board.get_current_player()
+    hidden = [(r, c) for r in range(3) for c in range(4)
+              if player.grid[r][c] is not None and not player.revealed[r][c]]
+    if board.state == "select_initial_cards":
+        return [("select_initial_card", r, c) for r, c in hidden]
+    if board.state not in ["playing", "end_round"]:
+        return []
+
+    if board.phase == "choose_pile":
+        actions = []
+        if not rules.deck.is_empty():
+            actions.append(("draw_from_deck", None, None))
+        if rules.discard_pile:
+            actions.append(("draw_from_discard", None, None))
+        return actions
+    if board.phase == "decide_card":
+        return [("keep_card", None, None), ("discard_card", None, None)]
+    if board.phase == "swap_card":
+        return [("swap_card", r, c) for r in range(3) for c in range(4)
+                if player.grid[r][c] is not None]
+    if board.phase == "flip_card":
+        return [("flip_card", r, c) for r, c in hidden]
+    return []
+
+
+class Policy:
+    """Base class for bot strategies.
+
+    choose() gets the full Rules object but must only look at what the
+    player could see on screen: revealed cards, pile sizes, the top of the
+    discard pile and the held card.
+    """
+
+    name = "policy"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose(self, rules, player_name):
+        """Return the (action, row, col) to play"""
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """Plays a uniformly random legal action"""
+
+    name = "random"
+
+    def choose(self, rules, player_name):
+        return self.rng.choice(legal_actions(rules, player_name))
+
+
+class GreedyPolicy(Policy):
+    """Keeps low cards, replaces its highest revealed card and builds columns"""
+
+    name = "greedy"
+    keep_threshold = 4  # Cards up to this value are always worth keeping
+
+    def choose(self, rules, player_name):
+        board = rules.board
+        actions = legal_actions(rules, player_name)
+        if board.state in ["round_end", "select_initial_cards"] or len(actions) == 1:
+            return self.rng.choice(actions)
+
+        player = board.get_current_player()
+        if board.phase == "choose_pile":
+            top = rules.discard_pile[-1] if rules.discard_pile else None
+            if top is not None and self._is_useful(player, top):
+                return ("draw_from_discard", None, None)
+            return actions[0]
+        if board.phase == "decide_card":
+            if self._is_useful(player, rules.drawn_card):
+                return ("keep_card", None, None)
+            return ("discard_card", None, None)
+        if board.phase == "swap_card":
+            row, col = self._best_swap(player, rules.drawn_card)
+            return ("swap_card", row, col)
+        return self.rng.choice(actions)
+
+    def _is_useful(self, player, value):
+        """Whether taking the card improves the grid"""
+        if value <= self.keep_threshold:
+            return True
+        revealed = self._revealed_cells(player)
+        return any(player.grid[r][c] > value for r, c in revealed) or self._completes_column(player, value) is not None
+
+    def _best_swap(self, player, value):
+        """Pick the cell the held card should replace"""
+        column = self._completes_column(player, value)
+        if column is not None:
+            return column
+        revealed = self._revealed_cells(player)
+        if revealed:
+            r, c = max(revealed, key=lambda cell: player.grid[cell[0]][cell[1]])
+            if player.grid[r][c] > value:
+                return r, c
+        hidden = [(r, c) for r in range(3) for c in range(4)
+                  if player.grid[r][c] is not None and not player.revealed[r][c]]
+        if hidden:
+            return self.rng.choice(hidden)
+        return max(revealed, key=lambda cell: player.grid[cell[0]][cell[1]])
+
+    def _completes_column(self, player, value):
+        """Return a cell that would make a column of three matching cards"""
+        for c in range(4):
+            matching = [r for r in range(3) if player.revealed[r][c] and player.grid[r][c] == value]
+            if len(matching) == 2:
+                row = ({0, 1, 2} - set(matching)).pop()
+                if player.grid[row][c] is not None:
+                    return row, c
+        return None
+
+    def _revealed_cells(self, player):
+        return [(r, c) for r in range(3) for c in range(4)
+                if player.revealed[r][c] and player.grid[r][c] is not None]
+
+
+POLICIES = {
+    RandomPolicy.name: RandomPolicy,
+    GreedyPolicy.name: GreedyPolicy,
+}
+
+
+def load_policy(spec, seed=None):
+    """Build a policy from a registered name or a "module:Class" path"""
+    if spec in POLICIES:
+        return POLICIES[spec](seed)
+    if ":" not in spec:
+        raise ValueError(f"Unknown policy: {spec}")
+    module_name, class_name = spec.split(":", 1)
+    return getattr(importlib.import_module(module_name), class_name)(seed)
@@ -0,0 +1,47 @@
+# bots/simulate.py
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game.rules import Rules
+from .policies import legal_actions
+
+MAX_ACTIONS = 20000  # Safety net against policies that never finish a game
+
+
+def play_game(policies, seed=None, names=None, rules=None):
+    """Play one full game between policies without any networking.
+
+    policies are seated in order. Returns a dict with the final total
+    scores per seat, the number of rounds and the number of actions.
+    """
+    if names is None:
+        names = [f"P{i}" for i in range(len(policies))]
+    if rules is None:
+        rules = Rules(seed)
+    for name in names:
+        rules.add_player(name)
+    rules.start_game()
+
+    actions = 0
+    while rules.board.state != "game_over" and actions < MAX_ACTIONS:
+        board = rules.board
+        if board.state == "round_end":
+            rules.handle_action(rules.get_current_player_name(), "start_new_round")
+            actions += 1
+            continue
+        seat = board.current_player_index
+        name = names[seat]
+        action, row, col = policies[seat].choose(rules, name)
+        if not rules.handle_action(name, action, row, col):
+            # Fall back to any legal move so a buggy policy cannot stall the game
+            action, row, col = legal_actions(rules, name)[0]
+            rules.handle_action(name, action, row, col)
+        actions += 1
+
+    return {
+        "scores": [player.total_score for player in rules.board.players],
+        "rounds": rules.board.round_number,
+        "actions": actions,
+        "finished": rules.board.state == "game_over",
+    }
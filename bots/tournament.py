@@ -0,0 +1,299 @@
+# bots/tournament.py
+"""Round-robin and Swiss tournaments between bot policies.
+
+Games run on the Rules engine directly and are spread over a process pool.
+Every deal is played once per seat rotation with the same deck seed
+(duplicate format), so luck of the deal cancels out between policies.
+Results stream to a compact text file, one line per game:
+
+    <game_id> <seed> <policy,policy,...> <score,score,...> <rounds>
+
+Running the same command again skips the games already in the file, so an
+interrupted tournament resumes where it stopped. With --replays every game
+is also added to a binary replay archive (see game/replay.py).
+
+Example:
+    python -m bots.tournament greedy random --players 2 --deals 5000 --out results.txt
+"""
+import argparse
+import functools
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bots.policies import load_policy
+from bots.simulate import play_game
+from game.replay import ReplayWriter, encode_game
+from game.rules import Rules
+
+CHUNK_SIZE = 64  # Games handed to a worker at once
+FLUSH_EVERY = 1000  # Result lines written between flushes
+
+
+def deal_seed(base_seed, deal):
+    """Deck seed shared by all seat rotations of a deal"""
+    return (base_seed * 1000003 + deal) % (1 << 63)
+
+
+def _rotations(specs):
+    return [specs[i:] + specs[:i] for i in range(len(specs))]
+
+
+def round_robin_schedule(policies, players, deals, base_seed):
+    """Yield (game_id, seed, specs) for every table of every deal"""
+    game_id = 0
+    for table in itertools.combinations(policies, players):
+        for deal in range(deals):
+            seed = deal_seed(base_seed, deal)
+            for specs in _rotations(list(table)):
+                yield game_id, seed, specs
+                game_id += 1
+
+
+def swiss_round_first_id(policy_count, players, deals, round_index):
+    """game_id of the first game of a Swiss round; every round has the same number of games"""
+    tables = policy_count // players
+    return round_index * tables * deals * players
+
+
+def swiss_round_schedule(standings, players, deals, base_seed, round_index):
+    """Yield the games of one Swiss round, seating policies of similar standing together"""
+    tables = len(standings) // players
+    game_id = swiss_round_first_id(len(standings), players, deals, round_index)
+    for t in range(tables):
+        table = standings[t * players:(t + 1) * players]
+        for deal in range(deals):
+            seed = deal_seed(base_seed, round_index * deals + deal)
+            for specs in _rotations(list(table)):
+                yield game_id, seed, specs
+                game_id += 1
+
+
+def _play_task(task, record=False):
+    game_id, seed, specs = task
+    policies = [load_policy(spec, seed + seat) for seat, spec in enumerate(specs)]
+    rules = Rules(seed)
+    names = [f"P{seat}" for seat in range(len(specs))]
+    actions = []
+
+    def record_action(event, **data):
+        if event == "action":
+            actions.append((names.index(data["player"]), data["action"], data["row"], data["col"]))
+
+    if record:
+        rules.add_listener(record_action)
+    result = play_game(policies, seed, names, rules)
+    scores = ",".join(str(score) for score in result["scores"])
+    line = f"{game_id} {seed} {','.join(specs)} {scores} {result['rounds']}\n"
+    if not record:
+        return line, None
+    return line, encode_game(seed, names, actions, rules.state_hash(), result["finished"])
+
+
+def parse_result(line):
+    """Turn a result line back into a dict"""
+    game_id, seed, specs, scores, rounds = line.split()
+    return {
+        "game_id": int(game_id),
+        "seed": int(seed),
+        "policies": specs.split(","),
+        "scores": [int(score) for score in scores.split(",")],
+        "rounds": int(rounds),
+    }
+
+
+def load_results(path):
+    """Read a result file, dropping a half-written last line left by a crash"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r+") as f:
+        good_size = 0
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                result = parse_result(line)
+            except ValueError:
+                break
+            results[result["game_id"]] = result
+            good_size += len(line)
+        f.truncate(good_size)
+    return results
+
+
+def run_games(tasks, path, workers, done, replays=None):
+    """Play every task not in done and append the results to path"""
+    pending = [task for task in tasks if task[0] not in done]
+    if not pending:
+        return 0
+    written = 0
+    play = functools.partial(_play_task, record=replays is not None)
+    with open(path, "a") as out:
+        if workers <= 1:
+            lines = map(play, pending)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers)
+            lines = pool.imap_unordered(play, pending, CHUNK_SIZE)
+        try:
+            for line, replay in lines:
+                out.write(line)
+                if replays is not None:
+                    replays.add_encoded(replay)
+                result = parse_result(line)
+                done[result["game_id"]] = result
+                written += 1
+                if written % FLUSH_EVERY == 0:
+                    out.flush()
+                    print(f"{written}/{len(pending)} games")
+        except KeyboardInterrupt:
+            if pool is not None:
+                pool.terminate()
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    return written
+
+
+def _pairwise(results):
+    """Count pairwise wins (lower total score wins, ties count half)"""
+    wins = {}
+    games = {}
+    for result in results:
+        seats = list(zip(result["policies"], result["scores"]))
+        for (a, score_a), (b, score_b) in itertools.combinations(seats, 2):
+            if a == b:
+                continue
+            outcome = 1.0 if score_a < score_b else 0.5 if score_a == score_b else 0.0
+            wins[a, b] = wins.get((a, b), 0.0) + outcome
+            wins[b, a] = wins.get((b, a), 0.0) + 1.0 - outcome
+            games[a, b] = games.get((a, b), 0) + 1
+            games[b, a] = games.get((b, a), 0) + 1
+    return wins, games
+
+
+def elo_ratings(results, iterations=200):
+    """Fit Bradley-Terry strengths to the pairwise results, on the Elo scale.
+
+    Unlike sequential Elo updates the fit does not depend on the order in
+    which games finished, so parallel and resumed runs rate identically.
+    """
+    wins, games = _pairwise(results)
+    names = sorted({a for a, _ in games})
+    if not names:
+        return {}
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        for name in names:
+            # Half a virtual win and loss against every opponent keeps ratings finite
+            won = 0.0
+            denominator = 0.0
+            for other in names:
+                if (name, other) in games:
+                    won += wins[name, other] + 0.5
+                    denominator += (games[name, other] + 1) / (strength[name] + strength[other])
+            strength[name] = won / denominator
+        mean = math.exp(sum(math.log(s) for s in strength.values()) / len(names))
+        strength = {name: s / mean for name, s in strength.items()}
+    return {name: 1500 + 400 * math.log10(s) for name, s in strength.items()}
+
+
+def summarize(results):
+    """Per-policy games, average score, win rate and rating"""
+    stats = {}
+    for result in results:
+        best = min(result["scores"])
+        winners = result["scores"].count(best)
+        for spec, score in zip(result["policies"], result["scores"]):
+            entry = stats.setdefault(spec, {"games": 0, "score": 0, "wins": 0.0})
+            entry["games"] += 1
+            entry["score"] += score
+            if score == best:
+                entry["wins"] += 1 / winners
+    ratings = elo_ratings(results)
+    summary = []
+    for spec, entry in stats.items():
+        summary.append({
+            "policy": spec,
+            "games": entry["games"],
+            "avg_score": entry["score"] / entry["games"],
+            "win_rate": entry["wins"] / entry["games"],
+            "elo": ratings.get(spec, 1500.0),
+        })
+    summary.sort(key=lambda row: row["elo"], reverse=True)
+    return summary
+
+
+def standings(policies, results):
+    """Order policies by Swiss points (wins) so far, best first"""
+    points = {spec: 0.0 for spec in policies}
+    for result in results:
+        best = min(result["scores"])
+        winners = result["scores"].count(best)
+        for spec, score in zip(result["policies"], result["scores"]):
+            if score == best:
+                points[spec] += 1 / winners
+    return sorted(policies, key=lambda spec: (-points[spec], policies.index(spec)))
+
+
+def run_tournament(policies, path, players=2, deals=100, fmt="round-robin", rounds=3,
+                   workers=None, seed=0, replay_path=None):
+    """Run a whole tournament, resuming from path, and return the summary"""
+    workers = workers or os.cpu_count() or 1
+    done = load_results(path)
+    replays = ReplayWriter(replay_path) if replay_path else None
+    try:
+        if fmt == "round-robin":
+            run_games(round_robin_schedule(policies, players, deals, seed), path, workers, done, replays)
+        elif fmt == "swiss":
+            for round_index in range(rounds):
+                # Only the earlier rounds count, so a resumed round is paired as it was at first
+                first_id = swiss_round_first_id(len(policies), players, deals, round_index)
+                order = standings(policies, [r for r in done.values() if r["game_id"] < first_id])
+                run_games(swiss_round_schedule(order, players, deals, seed, round_index),
+                          path, workers, done, replays)
+        else:
+            raise ValueError(f"Unknown tournament format: {fmt}")
+    finally:
+        if replays is not None:
+            replays.close()
+    return summarize(done.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Skyjo bot tournament")
+    parser.add_argument("policies", nargs="+", help="policy names or module:Class paths")
+    parser.add_argument("--players", type=int, default=2, choices=[2, 3, 4])
+    parser.add_argument("--deals", type=int, default=100, help="deals per table (each played in every seat rotation)")
+    parser.add_argument("--format", dest="fmt", default="round-robin", choices=["round-robin", "swiss"])
+    parser.add_argument("--rounds", type=int, default=3, help="Swiss rounds")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tournament_results.txt")
+    parser.add_argument("--replays", default=None, help="also record every game to this replay archive")
+    args = parser.parse_args(argv)
+
+    if len(args.policies) < args.players:
+        parser.error("need at least as many policies as players per table")
+    try:
+        summary = run_tournament(args.policies, args.out, args.players, args.deals,
+                                 args.fmt, args.rounds, args.workers, args.seed, args.replays)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted, run the same command again to resume from {args.out}")
+        return 1
+
+    print(f"{'policy':<20} {'games':>8} {'avg score':>10} {'win rate':>9} {'elo':>7}")
+    for row in summary:
+        print(f"{row['policy']:<20} {row['games']:>8} {row['avg_score']:>10.2f} "
+              f"{row['win_rate']:>9.3f} {row['elo']:>7.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,5 +3,7 @@ from .board import Board
 from .deck import Deck
 from .player import Player
 from .rules import Rules
+from .tracker import CardTracker
+from .zobrist import TranspositionTable
 
-__all__ = ['Board', 'Deck', 'Player', 'Rules']
+__all__ = ['Board', 'Deck', 'Player', 'Rules', 'CardTracker', 'TranspositionTable']
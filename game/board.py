@@ -9,8 +9,10 @@ class Board:
         self.trigger_player_index = None  # Player who triggered round end
         self.final_turn_players = []  # Players who have completed their final turn
         self.selected_cards_count = 0  # For initial card selection
+        self.trigger_doubled = False  # Whether the trigger player's last round score was doubled
 
     def add_player(self, player):
+        player.set_seat(len(self.players))
         self.players.append(player)
 
     def start_game(self):
@@ -119,12 +121,14 @@ class Board:
             min_score = min(scores)
             
             # Apply scoring rules
+            self.trigger_doubled = False
             for i, player in enumerate(self.players):
                 player.score = scores[i]
                 
                 # Double trigger player's score if they don't have the lowest score
                 if i == self.trigger_player_index and player.score > min_score:
                     player.score *= 2
+                    self.trigger_doubled = True
                 
                 player.total_score += player.score
             
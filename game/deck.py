@@ -1,33 +1,41 @@
 # game/deck.py
 import random
 
+# Originale Skyjo-Verteilung:
+# -2: 5x, 0: 15x, andere (1-12): je 10x, -1: 10x
+DISTRIBUTION = {
+    -2: 5,
+    -1: 10,
+    0: 15,
+    1: 10,
+    2: 10,
+    3: 10,
+    4: 10,
+    5: 10,
+    6: 10,
+    7: 10,
+    8: 10,
+    9: 10,
+    10: 10,
+    11: 10,
+    12: 10,
+}
+
 class Deck:
-    def __init__(self):
+    def __init__(self, rng=None):
         self.cards = self._generate_deck()
-        random.shuffle(self.cards)
+        (rng or random).shuffle(self.cards)
+
+    @classmethod
+    def from_cards(cls, cards):
+        """A deck holding exactly these cards, the last one on top"""
+        deck = cls.__new__(cls)
+        deck.cards = list(cards)
+        return deck
 
     def _generate_deck(self):
-        # Originale Skyjo-Verteilung:
-        # -2: 5x, 0: 15x, andere (1-12): je 10x, -1: 10x
-        distribution = {
-            -2: 5,
-            -1: 10,
-            0: 15,
-            1: 10,
-            2: 10,
-            3: 10,
-            4: 10,
-            5: 10,
-            6: 10,
-            7: 10,
-            8: 10,
-            9: 10,
-            10: 10,
-            11: 10,
-            12: 10,
-        }
         deck = []
-        for value, count in distribution.items():
+        for value, count in DISTRIBUTION.items():
             deck.extend([value] * count)
         return deck
 
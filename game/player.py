@@ -1,5 +1,6 @@
 # game/player.py
 import random
+from .zobrist import cell_key
 
 class Player:
     def __init__(self, name):
@@ -10,17 +11,33 @@ class Player:
         self.score = 0  # Current round score
         self.total_score = 0  # Total score across all rounds
         self.has_completed_final_turn = False  # For end-round tracking
+        self.seat = 0  # Index on the board, set by Board.add_player
+        self.zobrist = 0  # Incremental hash of the grid, zero for an empty grid
 
-    def place_card(self, row, col, value):
+    def set_seat(self, seat):
+        """Move the player to another seat and rehash the grid for it"""
+        self.seat = seat
+        self.zobrist = 0
+        for r in range(3):
+            for c in range(4):
+                self.zobrist ^= cell_key(seat, r, c, self.grid[r][c], self.revealed[r][c])
+
+    def _set_cell(self, row, col, value, revealed):
+        """Change a grid cell and update the hash for it"""
+        self.zobrist ^= (cell_key(self.seat, row, col, self.grid[row][col], self.revealed[row][col]) ^
+                         cell_key(self.seat, row, col, value, revealed))
         self.grid[row][col] = value
+        self.revealed[row][col] = revealed
+
+    def place_card(self, row, col, value):
+        self._set_cell(row, col, value, self.revealed[row][col])
 
     def reveal_card(self, row, col):
-        self.revealed[row][col] = True
+        self._set_cell(row, col, self.grid[row][col], True)
 
     def replace_card(self, row, col, new_value):
         old_value = self.grid[row][col]
-        self.grid[row][col] = new_value
-        self.revealed[row][col] = True
+        self._set_cell(row, col, new_value, True)
         return old_value
 
     def reveal_random(self):
@@ -28,7 +45,7 @@ class Player:
                      if not self.revealed[r][c] and self.grid[r][c] is not None]
         if unrevealed:
             r, c = random.choice(unrevealed)
-            self.revealed[r][c] = True
+            self.reveal_card(r, c)
             return r, c
         return None
 
@@ -76,8 +93,7 @@ class Player:
             col_vals[0] == col_vals[1] == col_vals[2]):
             # Remove the column
             for r in range(3):
-                self.grid[r][col] = None
-                self.revealed[r][col] = False
+                self._set_cell(r, col, None, False)
             return True
         return False
 
@@ -93,12 +109,13 @@ class Player:
         """Reveal all remaining cards (used at round end)"""
         for r in range(3):
             for c in range(4):
-                if self.grid[r][c] is not None:
-                    self.revealed[r][c] = True
+                if self.grid[r][c] is not None and not self.revealed[r][c]:
+                    self.reveal_card(r, c)
 
     def reset_for_new_round(self):
         """Reset player state for a new round"""
         self.grid = [[None for _ in range(4)] for _ in range(3)]
         self.revealed = [[False for _ in range(4)] for _ in range(3)]
+        self.zobrist = 0
         self.score = 0
         self.has_completed_final_turn = False
\ No newline at end of file
@@ -0,0 +1,374 @@
+# game/replay.py
+"""Compact binary replay archives.
+
+A game is fully determined by its deck seed, the player names and the list
+of accepted actions, so that is all an archive stores:
+
+    archive  = file header, block, block, ...
+    block    = b"SKYB", u32 game count, u32 offset of each game, games
+    game     = u64 seed, u64 final state hash, u8 player count, u8 flags,
+               u32 action count, (u8 length, utf-8 name) per player,
+               one 4-byte action record per action
+    action   = u8 seat, u8 action code, i8 row, i8 col (-1 when unused)
+
+Next to the archive an index file lists one fixed-width entry per block
+(offset, length, first game id, game count), so any game is found with a
+binary search over the index and one read of the block's offset table, and
+any turn of a game sits at a fixed offset after the game header. Both files
+are memory-mapped when read.
+"""
+import mmap
+import os
+import struct
+
+from .rules import ACTIONS, Rules
+
+FILE_MAGIC = b"SKYR\x01\x00\x00\x00"
+INDEX_MAGIC = b"SKYI\x01\x00\x00\x00"
+BLOCK_MAGIC = b"SKYB"
+BLOCK_GAMES = 256  # Games per block
+
+GAME_HEADER = struct.Struct("<QQBBI")
+ACTION_RECORD = struct.Struct("<BBbb")
+INDEX_ENTRY = struct.Struct("<QIII")  # Block offset, block length, first game id, game count
+NO_SEAT = 255  # Seat of actions that are not tied to a player
+
+FLAG_FINISHED = 1
+
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+def encode_game(seed, names, actions, final_hash=0, finished=True):
+    """Serialize one game; actions are (seat, action, row, col) tuples"""
+    parts = [GAME_HEADER.pack(seed, final_hash, len(names), FLAG_FINISHED if finished else 0, len(actions))]
+    for name in names:
+        raw = name.encode()[:255]
+        parts.append(bytes([len(raw)]) + raw)
+    for seat, action, row, col in actions:
+        parts.append(ACTION_RECORD.pack(
+            NO_SEAT if seat is None else seat, ACTION_CODES[action],
+            -1 if row is None else row, -1 if col is None else col,
+        ))
+    return b"".join(parts)
+
+
+def scan_blocks(path):
+    """Index entries of the complete blocks of an archive, found by walking the block headers"""
+    entries = []
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError(f"{path} is not a replay archive")
+        size = len(data)
+        offset = len(FILE_MAGIC)
+        first_game = 0
+        while offset + 8 <= size and data[offset:offset + len(BLOCK_MAGIC)] == BLOCK_MAGIC:
+            (count,) = struct.unpack_from("<I", data, offset + 4)
+            table_end = offset + 8 + 4 * count
+            if not count or table_end > size:
+                break
+            # The block ends with its last game, whose length follows from its header
+            (position,) = struct.unpack_from("<I", data, table_end - 4)
+            position += offset
+            if position + GAME_HEADER.size > size:
+                break
+            _, _, players, _, actions = GAME_HEADER.unpack_from(data, position)
+            position += GAME_HEADER.size
+            for _ in range(players):
+                if position >= size:
+                    break
+                position += 1 + data[position]
+            position += actions * ACTION_RECORD.size
+            if position > size:
+                break  # Cut off by a crash
+            entries.append((offset, position - offset, first_game, count))
+            first_game += count
+            offset = position
+    finally:
+        data.close()
+    return entries
+
+
+class ReplayWriter:
+    """Append games to a replay archive.
+
+    Call record(rules) before the game starts; the game is written to the
+    archive once it is over. Finished games are buffered and written one
+    block at a time, followed by the block's index entry.
+    """
+
+    def __init__(self, path, block_games=BLOCK_GAMES):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.block_games = block_games
+        self.pending = []  # Encoded games of the block being filled
+        self.next_game_id = 0
+        self._open()
+
+    def _open(self):
+        """Open both files for appending, cutting off a block a crash left without an index entry"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, "wb") as f:
+                f.write(FILE_MAGIC)
+            with open(self.index_path, "wb") as f:
+                f.write(INDEX_MAGIC)
+        elif not os.path.exists(self.index_path):
+            # Deleted, or lost in a crash: the block headers hold everything it had
+            entries = scan_blocks(self.path)
+            with open(self.index_path, "wb") as f:
+                f.write(INDEX_MAGIC)
+                for entry in entries:
+                    f.write(INDEX_ENTRY.pack(*entry))
+        end = len(FILE_MAGIC)
+        with open(self.index_path, "r+b") as f:
+            data = f.read()
+            count = (len(data) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+            f.truncate(len(INDEX_MAGIC) + count * INDEX_ENTRY.size)
+            if count:
+                offset, length, first_game, games = INDEX_ENTRY.unpack_from(
+                    data, len(INDEX_MAGIC) + (count - 1) * INDEX_ENTRY.size)
+                end = offset + length
+                self.next_game_id = first_game + games
+        with open(self.path, "r+b") as f:
+            f.truncate(end)
+        self.archive = open(self.path, "ab")
+        self.index = open(self.index_path, "ab")
+
+    def record(self, rules):
+        """Follow a game and add it to the archive when it ends"""
+        recorder = _GameRecorder(self, rules)
+        rules.add_listener(recorder)
+        return recorder
+
+    def add_game(self, seed, names, actions, final_hash=0, finished=True):
+        """Add a game to the archive and return its game id"""
+        return self.add_encoded(encode_game(seed, names, actions, final_hash, finished))
+
+    def add_encoded(self, game):
+        """Add a game already serialized with encode_game"""
+        self.pending.append(game)
+        game_id = self.next_game_id + len(self.pending) - 1
+        if len(self.pending) >= self.block_games:
+            self.flush()
+        return game_id
+
+    def flush(self):
+        """Write the buffered games as one block"""
+        if not self.pending:
+            return
+        table_size = len(BLOCK_MAGIC) + 4 + 4 * len(self.pending)
+        offsets = []
+        position = table_size
+        for game in self.pending:
+            offsets.append(position)
+            position += len(game)
+        block = b"".join([BLOCK_MAGIC, struct.pack(f"<I{len(offsets)}I", len(offsets), *offsets)] + self.pending)
+
+        offset = self.archive.tell()
+        self.archive.write(block)
+        self.archive.flush()
+        self.index.write(INDEX_ENTRY.pack(offset, len(block), self.next_game_id, len(self.pending)))
+        self.index.flush()
+        self.next_game_id += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.archive.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _GameRecorder:
+    """Rules listener collecting the actions of one game"""
+
+    def __init__(self, writer, rules):
+        self.writer = writer
+        self.rules = rules
+        self.seed = rules.seed
+        self.names = []
+        self.actions = []
+        self.game_id = None
+
+    def __call__(self, event, **data):
+        if event == "start_game":
+            self.seed = data["seed"]
+            self.names = data["names"]
+        elif event == "action":
+            seat = self.names.index(data["player"]) if data["player"] in self.names else None
+            self.actions.append((seat, data["action"], data["row"], data["col"]))
+            if self.rules.board.state == "game_over":
+                self.finish()
+
+    def finish(self):
+        """Write the game now, e.g. when it is abandoned before the end"""
+        if self.game_id is not None:
+            return self.game_id
+        self.rules.remove_listener(self)
+        self.game_id = self.writer.add_game(
+            self.seed, self.names, self.actions, self.rules.state_hash(),
+            self.rules.board.state == "game_over",
+        )
+        return self.game_id
+
+
+class Replay:
+    """One recorded game, backed by a slice of the memory-mapped archive"""
+
+    def __init__(self, game_id, buffer, offset):
+        self.game_id = game_id
+        seed, final_hash, players, flags, actions = GAME_HEADER.unpack_from(buffer, offset)
+        self.seed = seed
+        self.final_hash = final_hash
+        self.finished = bool(flags & FLAG_FINISHED)
+        self.action_count = actions
+        position = offset + GAME_HEADER.size
+        self.names = []
+        for _ in range(players):
+            length = buffer[position]
+            self.names.append(bytes(buffer[position + 1:position + 1 + length]).decode())
+            position += 1 + length
+        self.action_offset = position
+        self.buffer = buffer
+
+    def action(self, turn):
+        """Return the (seat, action, row, col) played at a turn"""
+        seat, code, row, col = ACTION_RECORD.unpack_from(self.buffer, self.action_offset + turn * ACTION_RECORD.size)
+        return (None if seat == NO_SEAT else seat, ACTIONS[code],
+                None if row < 0 else row, None if col < 0 else col)
+
+    def actions(self, start=0):
+        """Yield the actions from a turn onwards"""
+        for turn in range(start, self.action_count):
+            yield self.action(turn)
+
+    def raw_actions(self):
+        """The action records as one bytes-like view, for bulk decoding"""
+        end = self.action_offset + self.action_count * ACTION_RECORD.size
+        return memoryview(self.buffer)[self.action_offset:end]
+
+    def new_rules(self):
+        """A started game in its initial state"""
+        rules = Rules(self.seed)
+        for name in self.names:
+            rules.add_player(name)
+        rules.start_game()
+        return rules
+
+    def apply(self, rules, action):
+        """Play one recorded action on a reconstructed game"""
+        seat, name, row, col = action
+        player_name = self.names[seat] if seat is not None else rules.get_current_player_name()
+        if not rules.handle_action(player_name, name, row, col):
+            raise ValueError(f"Replay {self.game_id} diverged at action {name}")
+
+    def states(self, rules=None):
+        """Lazily yield the game after each action.
+
+        The same Rules object is updated in place and yielded every time;
+        copy what you need before advancing the generator. Listeners such as
+        a CardTracker can be attached to a Rules passed in before the start.
+        """
+        if rules is None:
+            rules = self.new_rules()
+        else:
+            for name in self.names:
+                rules.add_player(name)
+            rules.start_game()
+        for action in self.actions():
+            self.apply(rules, action)
+            yield rules
+
+    def state_at(self, turn):
+        """The game after the first `turn` actions"""
+        rules = self.new_rules()
+        for action in self.actions():
+            if turn <= 0:
+                break
+            self.apply(rules, action)
+            turn -= 1
+        return rules
+
+    def verify(self):
+        """Replay the game and compare its final state hash with the recorded one"""
+        rules = self.new_rules()
+        for action in self.actions():
+            self.apply(rules, action)
+        return rules.state_hash() == self.final_hash
+
+
+class ReplayReader:
+    """Random access to the games of a replay archive"""
+
+    def __init__(self, path):
+        self.path = path
+        self._archive_file = open(path, "rb")
+        self._index_file = open(path + ".idx", "rb")
+        self.archive = mmap.mmap(self._archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.archive[:len(FILE_MAGIC)] != FILE_MAGIC or self.index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a replay archive")
+        self.block_count = (len(self.index) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+
+    def _block_entry(self, block):
+        return INDEX_ENTRY.unpack_from(self.index, len(INDEX_MAGIC) + block * INDEX_ENTRY.size)
+
+    def __len__(self):
+        if not self.block_count:
+            return 0
+        _, _, first_game, games = self._block_entry(self.block_count - 1)
+        return first_game + games
+
+    def _find_block(self, game_id):
+        """Binary search the index for the block holding a game"""
+        low, high = 0, self.block_count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            _, _, first_game, games = self._block_entry(middle)
+            if game_id < first_game:
+                high = middle - 1
+            elif game_id >= first_game + games:
+                low = middle + 1
+            else:
+                return middle
+        raise IndexError(game_id)
+
+    def game(self, game_id):
+        """Return the Replay of a game id"""
+        offset, _, first_game, _ = self._block_entry(self._find_block(game_id))
+        relative = struct.unpack_from("<I", self.archive, offset + len(BLOCK_MAGIC) + 4 * (1 + game_id - first_game))[0]
+        return Replay(game_id, self.archive, offset + relative)
+
+    def block_games(self, block):
+        """Yield the Replays stored in one block"""
+        _, _, first_game, games = self._block_entry(block)
+        for game_id in range(first_game, first_game + games):
+            yield self.game(game_id)
+
+    def games(self, start_block=0, end_block=None):
+        """Yield the Replays of a range of blocks in archive order"""
+        if end_block is None:
+            end_block = self.block_count
+        for block in range(start_block, end_block):
+            yield from self.block_games(block)
+
+    def __iter__(self):
+        return self.games()
+
+    def close(self):
+        self.archive.close()
+        self.index.close()
+        self._archive_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
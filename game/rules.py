@@ -1,21 +1,88 @@
 # game/rules.py
+import json
 import random
 from .deck import Deck
 from .board import Board
 from .player import Player
+from .zobrist import DISCARD_KEYS, DRAWN_KEYS, DECK_SIZE_KEYS, board_key, score_key
+
+# Actions a client can send, see Rules.handle_action
+ACTIONS = (
+    "select_initial_card", "draw_from_deck", "draw_from_discard", "keep_card",
+    "discard_card", "swap_card", "flip_card", "start_new_round",
+)
 
 class Rules:
-    def __init__(self):
+    def __init__(self, seed=None):
+        # Every deck of the game is shuffled from this seed, so a game can be
+        # reproduced from its seed and the list of actions
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+        self.rng = random.Random(self.seed)
         self.deck = None
         self.discard_pile = []
         self.board = Board()
         self.drawn_card = None  # Card currently held by player
         self.game_message = ""
+        self.listeners = []  # Callables notified as listener(event, **data)
+        self.discard_hash = 0  # Incremental hash of the discard pile
+        self.version = 0  # Bumped on every change of the game state
+        self._views = {}  # Viewer name -> (version, state dict, encoded state)
+
+    def add_listener(self, listener):
+        """Register a callable that is notified of every engine event"""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Unregister a previously added listener"""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _push_discard(self, value):
+        """Put a card face-up on the discard pile"""
+        self.discard_hash ^= DISCARD_KEYS[len(self.discard_pile)][value]
+        self.discard_pile.append(value)
+
+    def _pop_discard(self):
+        """Take the top card off the discard pile"""
+        value = self.discard_pile.pop()
+        self.discard_hash ^= DISCARD_KEYS[len(self.discard_pile)][value]
+        return value
+
+    def _clear_discard_pile(self):
+        """Empty the discard pile"""
+        self.discard_pile = []
+        self.discard_hash = 0
+
+    def state_hash(self):
+        """Zobrist hash of the whole game state.
+
+        Grids and the discard pile are hashed incrementally as they change;
+        the remaining scalar fields, scores included, are folded in with one
+        key each. Equal game states always have equal hashes, so comparing
+        hashes is a cheap equality check.
+        """
+        key = self.discard_hash ^ DRAWN_KEYS[self.drawn_card] ^ board_key(self.board)
+        key ^= DECK_SIZE_KEYS[self.deck.cards_left() if self.deck else 0]
+        for player in self.board.players:
+            key ^= player.zobrist ^ score_key(player.seat, player.score, player.total_score)
+        return key
+
+    def _changed(self):
+        """Mark the game state as changed, invalidating all cached views"""
+        self.version += 1
+        self._views.clear()
+
+    def _emit(self, event, **data):
+        """Notify all listeners of an engine event"""
+        # Over a copy, as listeners may remove themselves while handling the event
+        for listener in tuple(self.listeners):
+            listener(event, **data)
 
     def add_player(self, name):
         """Add a player to the game"""
         player = Player(name)
         self.board.add_player(player)
+        self._changed()
 
     def start_game(self):
         """Start a new game"""
@@ -23,19 +90,22 @@ class Rules:
             return False
             
         # Create and shuffle deck
-        self.deck = Deck()
-        self.discard_pile = []
+        self.deck = Deck(self.rng)
+        self._clear_discard_pile()
         
         # Deal 12 cards to each player
         self.deal_cards()
         
         # Create initial discard pile
         if not self.deck.is_empty():
-            self.discard_pile.append(self.deck.draw_card())
+            self._push_discard(self.deck.draw_card())
+            self._emit("open_discard", value=self.discard_pile[-1])
         
         # Start the game
         self.board.start_game()
         self.game_message = f"{self.board.get_current_player().name}: Select 2 cards to flip"
+        self._emit("start_game", seed=self.seed, names=[player.name for player in self.board.players])
+        self._changed()
         return True
 
     def deal_cards(self):
@@ -45,7 +115,8 @@ class Rules:
             for i in range(3):
                 for j in range(4):
                     if not self.deck.is_empty():
-                        player.grid[i][j] = self.deck.draw_card()
+                        player.place_card(i, j, self.deck.draw_card())
+        self._emit("deal")
 
     def handle_initial_card_selection(self, player_name, row, col):
         """Handle initial card selection phase"""
@@ -63,6 +134,8 @@ class Rules:
             
         # Reveal the card
         current_player.reveal_card(row, col)
+        self._emit("reveal", player=current_player.name, row=row, col=col,
+                   value=current_player.grid[row][col])
         
         # Check if player has selected 2 cards
         player_selected_count = sum(sum(row) for row in current_player.revealed)
@@ -77,6 +150,7 @@ class Rules:
                 self.board.next_player()
                 self.game_message = f"{self.board.get_current_player().name}: Select 2 cards to flip"
                 
+        self._changed()
         return True
 
     def handle_draw_pile_action(self, player_name):
@@ -89,8 +163,10 @@ class Rules:
             
         # Draw card
         self.drawn_card = self.deck.draw_card()
+        self._emit("draw", value=self.drawn_card)
         self.board.phase = "decide_card"
         self.game_message = "Keep card or discard and flip one of yours?"
+        self._changed()
         return True
 
     def handle_discard_pile_action(self, player_name):
@@ -102,9 +178,11 @@ class Rules:
             return False
             
         # Take discard card
-        self.drawn_card = self.discard_pile.pop()
+        self.drawn_card = self._pop_discard()
+        self._emit("take_discard", value=self.drawn_card)
         self.board.phase = "swap_card"
         self.game_message = "Choose a card to swap"
+        self._changed()
         return True
 
     def handle_keep_card_action(self, player_name):
@@ -114,6 +192,7 @@ class Rules:
             
         self.board.phase = "swap_card"
         self.game_message = "Choose a card to swap"
+        self._changed()
         return True
 
     def handle_discard_drawn_card_action(self, player_name):
@@ -125,10 +204,12 @@ class Rules:
             return False
             
         # Discard the drawn card
-        self.discard_pile.append(self.drawn_card)
+        self._push_discard(self.drawn_card)
+        self._emit("discard", value=self.drawn_card)
         self.drawn_card = None
         self.board.phase = "flip_card"
         self.game_message = "Flip one of your face-down cards"
+        self._changed()
         return True
 
     def handle_card_swap(self, player_name, row, col):
@@ -144,12 +225,15 @@ class Rules:
             return False
             
         # Swap cards
+        was_revealed = current_player.revealed[row][col]
         old_card = current_player.replace_card(row, col, self.drawn_card)
-        self.discard_pile.append(old_card)
+        self._push_discard(old_card)
+        self._emit("swap", player=current_player.name, row=row, col=col,
+                   value=self.drawn_card, old_value=old_card, was_revealed=was_revealed)
         self.drawn_card = None
         
         # Check for column triples
-        removed_columns = current_player.check_all_columns()
+        removed_columns = self._remove_columns(current_player)
         
         # Check if player revealed all cards
         if current_player.all_cards_revealed():
@@ -157,6 +241,7 @@ class Rules:
         else:
             self._end_turn()
             
+        self._changed()
         return True
 
     def handle_card_flip(self, player_name, row, col):
@@ -174,9 +259,11 @@ class Rules:
             
         # Flip card
         current_player.reveal_card(row, col)
+        self._emit("reveal", player=current_player.name, row=row, col=col,
+                   value=current_player.grid[row][col])
         
         # Check for column triples
-        removed_columns = current_player.check_all_columns()
+        removed_columns = self._remove_columns(current_player)
         
         # Check if player revealed all cards
         if current_player.all_cards_revealed():
@@ -184,8 +271,41 @@ class Rules:
         else:
             self._end_turn()
 
+        self._changed()
         return True
 
+    def _remove_columns(self, player):
+        """Remove completed columns of a player and report each removal"""
+        column_values = [player.grid[0][col] for col in range(4)]
+        removed_columns = player.check_all_columns()
+        for col in removed_columns:
+            self._emit("remove_column", player=player.name, col=col, value=column_values[col])
+        return removed_columns
+
+    def handle_action(self, player_name, action, row=None, col=None):
+        """Dispatch a client action to its handler"""
+        if action == "select_initial_card":
+            success = self.handle_initial_card_selection(player_name, row, col)
+        elif action == "draw_from_deck":
+            success = self.handle_draw_pile_action(player_name)
+        elif action == "draw_from_discard":
+            success = self.handle_discard_pile_action(player_name)
+        elif action == "keep_card":
+            success = self.handle_keep_card_action(player_name)
+        elif action == "discard_card":
+            success = self.handle_discard_drawn_card_action(player_name)
+        elif action == "swap_card":
+            success = self.handle_card_swap(player_name, row, col)
+        elif action == "flip_card":
+            success = self.handle_card_flip(player_name, row, col)
+        elif action == "start_new_round":
+            success = self.start_new_round()
+        else:
+            return False
+        if success:
+            self._emit("action", player=player_name, action=action, row=row, col=col)
+        return success
+
     def _trigger_round_end(self):
         """Trigger the end of the round"""
         current_player = self.board.get_current_player()
@@ -208,7 +328,16 @@ class Rules:
 
     def _complete_round(self):
         """Complete the round and calculate scores"""
+        # Report the face-down cards that are about to be revealed for scoring
+        for player in self.board.players:
+            for r in range(3):
+                for c in range(4):
+                    if not player.revealed[r][c] and player.grid[r][c] is not None:
+                        self._emit("reveal", player=player.name, row=r, col=c, value=player.grid[r][c])
         self.board.end_round()
+        self._emit("round_end", round_number=self.board.round_number,
+                   scores=[player.score for player in self.board.players],
+                   trigger=self.board.trigger_player_index, doubled=self.board.trigger_doubled)
         
         # Generate score message
         score_messages = []
@@ -225,6 +354,8 @@ class Rules:
             else:
                 winner_names = [w.name for w in winners]
                 self.game_message = f"Game Over! Tie between {', '.join(winner_names)} with {winners[0].total_score} points!"
+            self._emit("game_over", scores={player.name: player.total_score for player in self.board.players},
+                       rounds=self.board.round_number)
         else:
             self.game_message += " | Click to start new round..."
 
@@ -235,8 +366,8 @@ class Rules:
             trigger_player_index = self.board.trigger_player_index
             
             # Reset for new round
-            self.deck = Deck()
-            self.discard_pile = []
+            self.deck = Deck(self.rng)
+            self._clear_discard_pile()
             self.drawn_card = None
             
             # Start new round (this resets players and sets up the round)
@@ -247,7 +378,8 @@ class Rules:
             
             # Create initial discard pile
             if not self.deck.is_empty():
-                self.discard_pile.append(self.deck.draw_card())
+                self._push_discard(self.deck.draw_card())
+                self._emit("open_discard", value=self.discard_pile[-1])
             
             # Set appropriate message based on round type
             if self.board.round_number == 1:
@@ -258,6 +390,7 @@ class Rules:
                 trigger_player_name = self.board.get_current_player().name
                 self.game_message = f"{trigger_player_name}'s turn: Choose Draw or Discard"
             
+            self._changed()
             return True
         return False
 
@@ -294,17 +427,48 @@ class Rules:
         return True
 
     def get_game_state_for_player(self, player_name):
-        """Get game state from a specific player's perspective"""
+        """Get game state from a specific player's perspective.
+
+        Views are cached per viewer until the next change of the game, so
+        the returned dict is shared and must not be modified.
+        """
+        return self._get_view(player_name)[1]
+
+    def get_encoded_state_for_player(self, player_name):
+        """Get the game state as a newline-terminated JSON message"""
+        view = self._get_view(player_name)
+        if view[2] is None:
+            view = (view[0], view[1], (json.dumps(view[1]) + '\n').encode())
+            self._views[player_name] = view
+        return view[2]
+
+    def get_state_reply(self, player_name, known_version=None):
+        """Encoded state, or a short "not modified" message if the viewer is up to date"""
+        if known_version == self.version:
+            return (json.dumps({"not_modified": True, "version": self.version}) + '\n').encode()
+        return self.get_encoded_state_for_player(player_name)
+
+    def _get_view(self, player_name):
+        view = self._views.get(player_name)
+        if view is None or view[0] != self.version:
+            view = (self.version, self._build_state_for_player(player_name), None)
+            self._views[player_name] = view
+        return view
+
+    def _build_state_for_player(self, player_name):
+        """Build the game state dict seen by a player"""
         players_data = {}
         for player in self.board.players:
             players_data[player.name] = {
-                "grid": player.grid,
-                "revealed": player.revealed,
+                # Copies, so cached views stay as they were when built
+                "grid": [row[:] for row in player.grid],
+                "revealed": [row[:] for row in player.revealed],
                 "score": player.get_revealed_score(),  # Real-time score from revealed cards
                 "total_score": player.total_score
             }
         
         return {
+            "version": self.version,
             "players": players_data,
             "board_info": {
                 "state": self.board.state,
@@ -0,0 +1,269 @@
+# game/slots.py
+"""Crash-safe game state in a memory-mapped file of fixed-size slots.
+
+Each live game owns one slot and its whole state is rewritten in place
+after every accepted action, so a restarted server can load every
+unfinished game straight from the file without replaying anything:
+
+    file  = slot, slot, ...            (SLOT_SIZE bytes each)
+    slot  = copy, copy                 (COPY_SIZE bytes each)
+    copy  = b"SKYS", u32 crc32 of the payload, u64 sequence, payload
+    payload = u64 seed, u64 version, board fields, drawn card, deck and
+              discard sizes, per seat (48-byte name, 12 i8 cells, u16
+              revealed mask, i32 score, i32 total score, u8 flags),
+              150 i8 deck cards, 150 i8 discard cards, u16 length and
+              200 bytes of the game message
+
+Writes alternate between the two copies of a slot, so a write torn by a
+crash only ever damages the older one; loading takes the valid copy with
+the higher sequence. Writes go to the page cache only, which survives a
+crash of the server process; flush() also syncs them to disk.
+"""
+import mmap
+import os
+import struct
+import zlib
+
+from .deck import DISTRIBUTION, Deck
+from .rules import Rules
+
+MAGIC = b"SKYS"
+SLOTS = 256  # Slots in a new file
+COPY_SIZE = 1024
+SLOT_SIZE = 2 * COPY_SIZE
+
+MAX_PLAYERS = 4
+NAME_BYTES = 48
+MAX_CARDS = sum(DISTRIBUTION.values())
+MESSAGE_BYTES = 200
+NO_CARD = -128  # Empty cell, no drawn card
+
+STATES = ("waiting", "select_initial_cards", "playing", "end_round", "round_end", "game_over")
+PHASES = (None, "choose_pile", "decide_card", "swap_card", "flip_card")
+
+FLAG_TRIGGER_DOUBLED = 1
+FLAG_READY = 1
+FLAG_COMPLETED_FINAL_TURN = 2
+
+HEADER = struct.Struct("<4sIQ")
+SEAT_FORMAT = f"{NAME_BYTES}s12bHiiB"
+PAYLOAD = struct.Struct(
+    "<QQBBBbbBBBHbHH" + SEAT_FORMAT * MAX_PLAYERS + f"{MAX_CARDS}b{MAX_CARDS}bH{MESSAGE_BYTES}s")
+assert HEADER.size + PAYLOAD.size <= COPY_SIZE
+
+
+def _card(value):
+    return NO_CARD if value is None else value
+
+
+def _value(card):
+    return None if card == NO_CARD else card
+
+
+def encode_state(rules):
+    """Pack the state of a started game into a slot payload"""
+    board = rules.board
+    players = board.players
+    if len(players) > MAX_PLAYERS:
+        raise ValueError(f"Slots hold at most {MAX_PLAYERS} players")
+    deck = rules.deck.cards if rules.deck else []
+    final_turn = 0
+    for seat in board.final_turn_players:
+        final_turn |= 1 << seat
+    values = [
+        rules.seed, rules.version, STATES.index(board.state), PHASES.index(board.phase), len(players),
+        board.current_player_index, -1 if board.trigger_player_index is None else board.trigger_player_index,
+        final_turn, board.selected_cards_count, FLAG_TRIGGER_DOUBLED if board.trigger_doubled else 0,
+        board.round_number, _card(rules.drawn_card), len(deck), len(rules.discard_pile),
+    ]
+    for seat in range(MAX_PLAYERS):
+        if seat >= len(players):
+            values += [b""] + [NO_CARD] * 12 + [0, 0, 0, 0]
+            continue
+        player = players[seat]
+        name = player.name.encode()
+        if len(name) > NAME_BYTES:
+            raise ValueError(f"Player name longer than {NAME_BYTES} bytes: {player.name}")
+        revealed = 0
+        for i in range(12):
+            if player.revealed[i // 4][i % 4]:
+                revealed |= 1 << i
+        flags = ((FLAG_READY if player.ready else 0) |
+                 (FLAG_COMPLETED_FINAL_TURN if player.has_completed_final_turn else 0))
+        values.append(name)
+        values += [_card(value) for row in player.grid for value in row]
+        values += [revealed, player.score, player.total_score, flags]
+    values += deck + [0] * (MAX_CARDS - len(deck))
+    values += rules.discard_pile + [0] * (MAX_CARDS - len(rules.discard_pile))
+    message = rules.game_message.encode()[:MESSAGE_BYTES]
+    values += [len(message), message]
+    return PAYLOAD.pack(*values)
+
+
+def decode_state(payload):
+    """Rebuild a Rules object from a slot payload, without emitting events"""
+    values = PAYLOAD.unpack(payload)
+    (seed, version, state, phase, count, current, trigger, final_turn, selected, flags,
+     round_number, drawn, deck_size, discard_size) = values[:14]
+    seats = values[14:14 + 17 * MAX_PLAYERS]
+    cards = values[14 + 17 * MAX_PLAYERS:]
+    deck = cards[:deck_size]
+    discard = cards[MAX_CARDS:MAX_CARDS + discard_size]
+    message_length, message = cards[2 * MAX_CARDS:]
+
+    rules = Rules(seed)
+    for seat in range(count):
+        rules.add_player(seats[17 * seat].rstrip(b"\0").decode())
+    # Every round shuffled one deck from the seeded generator; shuffle as many
+    # again so the next round's deck is the one it would have been
+    for _ in range(round_number):
+        Deck(rules.rng)
+    rules.deck = Deck.from_cards(deck) if round_number else None
+    for value in discard:
+        rules._push_discard(value)
+    rules.drawn_card = _value(drawn)
+    rules.game_message = message[:message_length].decode(errors="replace")
+
+    board = rules.board
+    board.state = STATES[state]
+    board.phase = PHASES[phase]
+    board.current_player_index = current
+    board.trigger_player_index = None if trigger < 0 else trigger
+    # Final turns are taken in seat order, starting with the trigger player
+    board.final_turn_players = sorted((seat for seat in range(count) if final_turn >> seat & 1),
+                                      key=lambda seat: (seat - max(trigger, 0)) % count)
+    board.selected_cards_count = selected
+    board.trigger_doubled = bool(flags & FLAG_TRIGGER_DOUBLED)
+    board.round_number = round_number
+    for seat, player in enumerate(board.players):
+        fields = seats[17 * seat:17 * (seat + 1)]
+        revealed = fields[13]
+        for i in range(12):
+            player._set_cell(i // 4, i % 4, _value(fields[1 + i]), bool(revealed >> i & 1))
+        player.score, player.total_score = fields[14], fields[15]
+        player.ready = bool(fields[16] & FLAG_READY)
+        player.has_completed_final_turn = bool(fields[16] & FLAG_COMPLETED_FINAL_TURN)
+    # Newer than any version a client may have seen before the restart
+    rules.version = version
+    rules._changed()
+    return rules
+
+
+class StateSlots:
+    """A file of game state slots, mapped into memory"""
+
+    def __init__(self, path, slots=SLOTS):
+        self.path = path
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        self.file = open(path, "r+b")
+        size = os.path.getsize(path)
+        if size < slots * SLOT_SIZE or size % SLOT_SIZE:
+            self.file.truncate(max(slots, -(-size // SLOT_SIZE)) * SLOT_SIZE)
+        self.slots = os.path.getsize(path) // SLOT_SIZE
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.sequences = {}  # Slot -> sequence of its newest copy
+        self.claimed = set()  # Slots owned by games of this process
+        for slot in range(self.slots):
+            copy = self._newest_copy(slot)
+            if copy is not None:
+                self.sequences[slot] = copy[0]
+
+    def _read_copy(self, offset):
+        magic, crc, sequence = HEADER.unpack_from(self.map, offset)
+        if magic != MAGIC:
+            return None
+        payload = self.map[offset + HEADER.size:offset + HEADER.size + PAYLOAD.size]
+        if zlib.crc32(payload) != crc:
+            return None  # Torn by a crash in the middle of the write
+        return sequence, payload
+
+    def _newest_copy(self, slot):
+        copies = [self._read_copy(slot * SLOT_SIZE + half * COPY_SIZE) for half in range(2)]
+        copies = [copy for copy in copies if copy is not None]
+        return max(copies) if copies else None
+
+    def live(self):
+        """Slots holding an unfinished game"""
+        return sorted(self.sequences)
+
+    def claim(self):
+        """Reserve a free slot, returns None when the file is full"""
+        for slot in range(self.slots):
+            if slot not in self.sequences and slot not in self.claimed:
+                self.claimed.add(slot)
+                return slot
+        return None
+
+    def save(self, slot, rules):
+        """Write the game's current state over the older copy of the slot"""
+        payload = encode_state(rules)
+        sequence = self.sequences.get(slot, 0) + 1
+        offset = slot * SLOT_SIZE + (sequence % 2) * COPY_SIZE
+        end = offset + HEADER.size + len(payload)
+        self.map[offset:end] = HEADER.pack(MAGIC, zlib.crc32(payload), sequence) + payload
+        self.sequences[slot] = sequence
+        self.claimed.add(slot)
+
+    def load(self, slot):
+        """Rules object of the game in a slot, which this process then owns"""
+        copy = self._newest_copy(slot)
+        if copy is None:
+            raise ValueError(f"Slot {slot} holds no game")
+        self.claimed.add(slot)
+        return decode_state(copy[1])
+
+    def release(self, slot):
+        """Free a slot; neither copy is valid afterwards"""
+        for half in range(2):
+            offset = slot * SLOT_SIZE + half * COPY_SIZE
+            self.map[offset:offset + len(MAGIC)] = bytes(len(MAGIC))
+        self.sequences.pop(slot, None)
+        self.claimed.discard(slot)
+
+    def attach(self, rules, slot=None):
+        """Keep a game's state in a slot from its start (or now, for a loaded game) until it ends"""
+        writer = _SlotWriter(self, rules, slot)
+        rules.add_listener(writer)
+        return writer
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+
+class _SlotWriter:
+    """Listener saving one game to its slot after every accepted action"""
+
+    def __init__(self, slots, rules, slot):
+        self.slots = slots
+        self.rules = rules
+        self.slot = slot
+        self.enabled = True
+
+    def __call__(self, event, **data):
+        if event not in ("start_game", "action") or not self.enabled:
+            return
+        if self.rules.board.state == "game_over":
+            self.release()
+            return
+        if self.slot is None:
+            self.slot = self.slots.claim()
+            if self.slot is None:
+                return  # File full, this game is not persisted
+        try:
+            self.slots.save(self.slot, self.rules)
+        except ValueError:
+            # Too many seats or too long a name for a slot; never fail the action
+            self.release()
+            self.enabled = False
+
+    def release(self):
+        """Free the slot of a game that ended or was abandoned"""
+        if self.slot is not None:
+            self.slots.release(self.slot)
+            self.slot = None
@@ -0,0 +1,105 @@
+# game/tracker.py
+from .deck import DISTRIBUTION
+
+CARD_VALUES = sorted(DISTRIBUTION)
+VALUE_OFFSET = -CARD_VALUES[0]  # Index of a value in the count vector is value + VALUE_OFFSET
+
+
+class CardTracker:
+    """Track which card values the players have not seen yet.
+
+    The tracker keeps a count vector over the 15 card values covering every
+    card that is still in the deck or lying face-down on any grid. It is fed
+    by Rules events, so every update and every query is O(1). Every reveal
+    in Skyjo is public, so the counts are the same for all seats.
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(CARD_VALUES)
+        self.unseen = 0  # Number of unseen cards
+        self.unseen_sum = 0  # Sum of the values of all unseen cards
+        self.reset()
+
+    def attach(self, rules):
+        """Start following a game, catching up with its current state once"""
+        rules.add_listener(self)
+        if rules.deck is not None:
+            self.rebuild(rules)
+
+    def detach(self, rules):
+        """Stop following a game"""
+        rules.remove_listener(self)
+
+    def reset(self):
+        """Mark every card of a fresh deck as unseen"""
+        for value, count in DISTRIBUTION.items():
+            self.counts[value + VALUE_OFFSET] = count
+        self.unseen = sum(DISTRIBUTION.values())
+        self.unseen_sum = sum(value * count for value, count in DISTRIBUTION.items())
+
+    def rebuild(self, rules):
+        """Recompute the counts from scratch by scanning the whole game.
+
+        Columns removed earlier in the round are no longer on the grids, so
+        attach the tracker before the deal to get exact counts.
+        """
+        self.reset()
+        for player in rules.board.players:
+            for r in range(3):
+                for c in range(4):
+                    if player.revealed[r][c] and player.grid[r][c] is not None:
+                        self.see(player.grid[r][c])
+        for value in rules.discard_pile:
+            self.see(value)
+        if rules.drawn_card is not None:
+            self.see(rules.drawn_card)
+
+    def see(self, value):
+        """Mark one card of the given value as seen"""
+        self.counts[value + VALUE_OFFSET] -= 1
+        self.unseen -= 1
+        self.unseen_sum -= value
+
+    def count(self, value):
+        """Number of unseen cards with the given value"""
+        return self.counts[value + VALUE_OFFSET]
+
+    def probability(self, value):
+        """Probability that a random unseen card has the given value"""
+        if self.unseen == 0:
+            return 0.0
+        return self.counts[value + VALUE_OFFSET] / self.unseen
+
+    def expected_value(self):
+        """Expected value of a random unseen card"""
+        if self.unseen == 0:
+            return 0.0
+        return self.unseen_sum / self.unseen
+
+    def distribution(self):
+        """Return a {value: count} dict of the unseen cards"""
+        return {value: self.counts[value + VALUE_OFFSET] for value in CARD_VALUES}
+
+    # Event handlers
+
+    def __call__(self, event, **data):
+        handler = getattr(self, "_on_" + event, None)
+        if handler is not None:
+            handler(**data)
+
+    def _on_deal(self):
+        self.reset()
+
+    def _on_open_discard(self, value):
+        self.see(value)
+
+    def _on_draw(self, value):
+        self.see(value)
+
+    def _on_reveal(self, player, row, col, value):
+        self.see(value)
+
+    def _on_swap(self, player, row, col, value, old_value, was_revealed):
+        # The replaced card lands face-up on the discard pile
+        if not was_revealed:
+            self.see(old_value)
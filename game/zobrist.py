@@ -0,0 +1,136 @@
+# game/zobrist.py
+import random
+
+from .deck import DISTRIBUTION
+
+MAX_SEATS = 8  # Seats with their own key tables
+MAX_CARDS = sum(DISTRIBUTION.values())
+MAX_ROUNDS = 64  # Round numbers beyond this share keys
+MASK = (1 << 64) - 1
+STATES = ["waiting", "select_initial_cards", "playing", "end_round", "round_end", "game_over"]
+PHASES = [None, "choose_pile", "decide_card", "swap_card", "flip_card"]
+
+# Keys are generated from a fixed seed so hashes agree between processes
+_rng = random.Random(0x5C1A0)
+
+
+def _key():
+    return _rng.getrandbits(64)
+
+
+def _value_keys():
+    """One key per card value plus an empty slot key of zero"""
+    keys = {None: 0}
+    for value in sorted(DISTRIBUTION):
+        keys[value] = _key()
+    return keys
+
+
+# CELL_KEYS[seat][row][col][revealed][value]; an empty cell hashes to zero
+CELL_KEYS = [
+    [[[_value_keys(), _value_keys()] for _ in range(4)] for _ in range(3)]
+    for _ in range(MAX_SEATS)
+]
+DISCARD_KEYS = [_value_keys() for _ in range(MAX_CARDS)]  # Per pile position
+DRAWN_KEYS = _value_keys()
+DECK_SIZE_KEYS = [_key() for _ in range(MAX_CARDS + 1)]
+STATE_KEYS = {state: _key() for state in STATES}
+PHASE_KEYS = {phase: _key() for phase in PHASES}
+CURRENT_PLAYER_KEYS = [_key() for _ in range(MAX_SEATS)]
+TRIGGER_PLAYER_KEYS = [_key() for _ in range(MAX_SEATS)]
+FINAL_TURN_KEYS = [_key() for _ in range(MAX_SEATS)]
+ROUND_KEYS = [_key() for _ in range(MAX_ROUNDS)]
+ROUND_SCORE_KEYS = [_key() for _ in range(MAX_SEATS)]
+TOTAL_SCORE_KEYS = [_key() for _ in range(MAX_SEATS)]
+TRIGGER_DOUBLED_KEY = _key()
+
+
+def cell_key(seat, row, col, value, revealed):
+    """Key of a single grid cell"""
+    return CELL_KEYS[seat % MAX_SEATS][row][col][1 if revealed else 0][value]
+
+
+def _mix(x):
+    """splitmix64 finalizer: spreads the bits of a 64-bit value over the whole key"""
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+def score_key(seat, score, total_score):
+    """Key of a player's round and total score.
+
+    Scores have no fixed range, so they are mixed into a per-seat key
+    instead of looked up in a table.
+    """
+    seat %= MAX_SEATS
+    return _mix(ROUND_SCORE_KEYS[seat] ^ (score & MASK)) ^ _mix(TOTAL_SCORE_KEYS[seat] ^ (total_score & MASK))
+
+
+def board_key(board):
+    """Key of the turn structure held by a Board"""
+    key = (STATE_KEYS[board.state] ^ PHASE_KEYS[board.phase] ^
+           ROUND_KEYS[board.round_number % MAX_ROUNDS] ^
+           CURRENT_PLAYER_KEYS[board.current_player_index % MAX_SEATS])
+    if board.trigger_player_index is not None:
+        key ^= TRIGGER_PLAYER_KEYS[board.trigger_player_index % MAX_SEATS]
+    for index in board.final_turn_players:
+        key ^= FINAL_TURN_KEYS[index % MAX_SEATS]
+    if board.trigger_doubled:
+        key ^= TRIGGER_DOUBLED_KEY
+    return key
+
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed on Zobrist hashes.
+
+    Each hash maps to exactly one slot. A stored entry is replaced by a new
+    one for the same position, by any entry written during a newer search
+    (see new_search), or by a result searched at least as deep.
+    """
+
+    def __init__(self, size_bits=16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.keys = [0] * self.size
+        self.depths = [-1] * self.size
+        self.values = [None] * self.size
+        self.generations = [0] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def new_search(self):
+        """Age all stored entries so the next search may overwrite them"""
+        self.generation += 1
+
+    def get(self, key, min_depth=0):
+        """Return the value stored for a position, or None"""
+        index = key & self.mask
+        if self.keys[index] == key and self.depths[index] >= min_depth:
+            self.hits += 1
+            return self.values[index]
+        self.misses += 1
+        return None
+
+    def put(self, key, value, depth=0):
+        """Store a value for a position according to the replacement policy"""
+        index = key & self.mask
+        if (self.keys[index] == key or self.generations[index] != self.generation or
+                depth >= self.depths[index]):
+            self.keys[index] = key
+            self.depths[index] = depth
+            self.values[index] = value
+            self.generations[index] = self.generation
+            return True
+        return False
+
+    def clear(self):
+        """Remove all entries"""
+        self.keys = [0] * self.size
+        self.depths = [-1] * self.size
+        self.values = [None] * self.size
+        self.generations = [0] * self.size
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,274 @@
+"""Admin control socket for profiling a running server.
+
+Every server process (the standalone server and each matchmaker worker)
+listens on a local Unix socket, by default skyjo-admin-<pid>.sock in the
+temp directory. Commands are one JSON line, answered with one JSON line:
+
+    {"cmd": "profile", "seconds": 10, "interval_ms": 5, "out": "p.folded"}
+        Sample the stacks of all threads for a bounded window and write
+        them in folded format (flamegraph.pl, speedscope) to out.
+    {"cmd": "timings", "enable": true, "reset": false}
+        Turn the timing wrappers around the Rules.handle_* methods and
+        GameTable.send_game_state_to_all on or off, and return their stats.
+
+Players stay connected throughout; the wrappers are only installed while
+timings are enabled.
+
+Example:
+    python net/admin.py profile --seconds 10 --out server.folded
+    python net/admin.py timings --enable
+"""
+import argparse
+import collections
+import functools
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game.rules import Rules
+from net.log import get_logger
+from net.transport import connect, listen, unix_sockets_supported
+
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL_MS = 5
+
+log = get_logger("admin")
+
+
+def default_admin_path(pid=None):
+    return os.path.join(tempfile.gettempdir(), f"skyjo-admin-{pid or os.getpid()}.sock")
+
+
+def rules_handlers():
+    """The Rules methods that apply an action"""
+    names = [name for name in vars(Rules) if name.startswith("handle_")] + ["start_new_round"]
+    return [(Rules, name) for name in names]
+
+
+def sample_stacks(seconds, interval):
+    """Count the Python stacks of all other threads every interval seconds"""
+    me = threading.get_ident()
+    stacks = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+class HandlerTimings:
+    """Timing wrappers that can be installed on methods and removed again"""
+
+    def __init__(self, methods):
+        self.methods = methods  # (class, method name) pairs
+        self.originals = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.originals)
+
+    def enable(self):
+        for cls, name in self.methods:
+            if (cls, name) not in self.originals:
+                original = vars(cls)[name]
+                self.originals[cls, name] = original
+                setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", original))
+
+    def disable(self):
+        for (cls, name), original in self.originals.items():
+            setattr(cls, name, original)
+        self.originals.clear()
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def _wrap(self, label, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self.lock:
+                    entry = self.stats.get(label)
+                    if entry is None:
+                        entry = self.stats[label] = [0, 0.0, 0.0]
+                    entry[0] += 1
+                    entry[1] += elapsed
+                    entry[2] = max(entry[2], elapsed)
+        return timed
+
+    def report(self):
+        with self.lock:
+            return {label: {"calls": calls, "total_ms": total * 1e3,
+                            "mean_us": total / calls * 1e6, "max_us": longest * 1e6}
+                    for label, (calls, total, longest) in self.stats.items()}
+
+
+class AdminServer:
+    """Answers admin commands on a local Unix socket"""
+
+    def __init__(self, methods, path=None):
+        self.path = path or default_admin_path()
+        self.timings = HandlerTimings(methods)
+        self.profiling = threading.Lock()  # One profile window at a time
+        self.listener = None
+
+    def start(self):
+        """Listen in a background thread, returns False where Unix sockets are missing"""
+        if not unix_sockets_supported():
+            return False
+        self.listener = listen(f"unix://{self.path}")
+        os.chmod(self.path, 0o600)  # Only the server's user may profile it
+        threading.Thread(target=self.serve, daemon=True, name="admin").start()
+        log.event("admin_listening", path=self.path)
+        return True
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.handle, args=(conn,), daemon=True, name="admin").start()
+
+    def handle(self, conn):
+        try:
+            buffer = b""
+            while not buffer.endswith(b"\n"):
+                data = conn.recv(4096)
+                if not data:
+                    return
+                buffer += data
+            try:
+                reply = self.run_command(json.loads(buffer))
+            except (ValueError, TypeError, KeyError, OSError) as e:
+                reply = {"ok": False, "error": str(e)}
+            conn.sendall((json.dumps(reply) + "\n").encode())
+        finally:
+            conn.close()
+
+    def run_command(self, command):
+        cmd = command["cmd"]
+        if cmd == "profile":
+            return self.profile(float(command.get("seconds", 10)),
+                                float(command.get("interval_ms", DEFAULT_INTERVAL_MS)) / 1000,
+                                command.get("out"))
+        if cmd == "timings":
+            if command.get("reset"):
+                self.timings.reset()
+            if command.get("enable") is True:
+                self.timings.enable()
+            elif command.get("enable") is False:
+                self.timings.disable()
+            return {"ok": True, "enabled": self.timings.enabled, "timings": self.timings.report()}
+        return {"ok": False, "error": f"Unknown command: {cmd}"}
+
+    def profile(self, seconds, interval, out=None):
+        seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+        out = out or f"skyjo-profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        if not self.profiling.acquire(blocking=False):
+            return {"ok": False, "error": "A profile is already running"}
+        try:
+            log.event("profile_started", seconds=seconds, out=out)
+            stacks = sample_stacks(seconds, interval)
+            with open(out, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        finally:
+            self.profiling.release()
+        log.event("profile_written", out=out, samples=sum(stacks.values()))
+        return {"ok": True, "out": os.path.abspath(out), "samples": sum(stacks.values()),
+                "stacks": len(stacks)}
+
+
+def send_command(path, command, timeout=None):
+    """Send one admin command and return the decoded reply"""
+    conn = connect(f"unix://{path}", timeout)
+    try:
+        conn.sendall((json.dumps(command) + "\n").encode())
+        buffer = b""
+        while not buffer.endswith(b"\n"):
+            data = conn.recv(65536)
+            if not data:
+                break
+            buffer += data
+    finally:
+        conn.close()
+    return json.loads(buffer)
+
+
+def _find_socket(pid):
+    if pid:
+        return default_admin_path(pid)
+    paths = glob.glob(os.path.join(tempfile.gettempdir(), "skyjo-admin-*.sock"))
+    if len(paths) != 1:
+        raise SystemExit(f"Found {len(paths)} admin sockets, choose one with --pid or --socket")
+    return paths[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile a running Skyjo server")
+    parser.add_argument("--socket", default=None, help="admin socket path")
+    parser.add_argument("--pid", type=int, default=None, help="server process id")
+    commands = parser.add_subparsers(dest="cmd", required=True)
+    profile = commands.add_parser("profile", help="sample all threads for a while")
+    profile.add_argument("--seconds", type=float, default=10)
+    profile.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_MS, help="milliseconds")
+    profile.add_argument("--out", default=None, help="folded stacks file, written by the server")
+    timings = commands.add_parser("timings", help="per-handler timings")
+    switch = timings.add_mutually_exclusive_group()
+    switch.add_argument("--enable", action="store_true")
+    switch.add_argument("--disable", action="store_true")
+    timings.add_argument("--reset", action="store_true")
+    args = parser.parse_args(argv)
+
+    path = args.socket or _find_socket(args.pid)
+    if args.cmd == "profile":
+        out = os.path.abspath(args.out) if args.out else None
+        reply = send_command(path, {"cmd": "profile", "seconds": args.seconds,
+                                    "interval_ms": args.interval, "out": out})
+        if reply["ok"]:
+            print(f"{reply['samples']} samples in {reply['stacks']} stacks written to {reply['out']}")
+    else:
+        command = {"cmd": "timings", "reset": args.reset}
+        if args.enable or args.disable:
+            command["enable"] = args.enable
+        reply = send_command(path, command)
+        if reply["ok"]:
+            print(f"timings {'enabled' if reply['enabled'] else 'disabled'}")
+            print(f"{'method':<45} {'calls':>8} {'mean us':>9} {'max us':>9} {'total ms':>9}")
+            for label, row in sorted(reply["timings"].items(), key=lambda item: -item[1]["total_ms"]):
+                print(f"{label:<45} {row['calls']:>8} {row['mean_us']:>9.1f} "
+                      f"{row['max_us']:>9.1f} {row['total_ms']:>9.1f}")
+    if not reply["ok"]:
+        print(f"Error: {reply['error']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
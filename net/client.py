@@ -1,30 +1,65 @@
-import socket
-import threading
+import functools
 import pygame
 import sys
-import json
-import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ui.buttons import Button
-from ui.screen import (
-    draw_player_grids, get_clicked_card, load_card_images, 
-    draw_game_info, draw_center_area, draw_game_over_screen, draw_held_card
-)
+from net.connection import ServerConnection
+from net.prediction import Predictor
+from net.transport import default_unix_path, unix_sockets_supported
+from ui.buttons import Button, WidgetLayer
+from ui.layout import get_layout
+from ui.renderer import Renderer
+from ui.text import render_text
+from ui.screen import load_card_images
 
 HOST = 'localhost'
 PORT = 12345
-client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-client.connect((HOST, PORT))
+IDLE_WAKEUP_MS = 1000  # Longest the window sleeps without any event
+
+# Posted by the connection thread when a state, prompt or status arrived
+STATE_EVENT = pygame.event.custom_type()
+# Action buttons (label, action) shown on our turn, by phase
+PHASE_BUTTONS = {
+    "choose_pile": (("Draw Deck", "draw_from_deck"), ("Take Discard", "draw_from_discard")),
+    "decide_card": (("Keep Card", "keep_card"), ("Discard Card", "discard_card")),
+}
+NEW_ROUND_BUTTON = (("Start New Round", "start_new_round"),)
+
+# Events that can change what is on screen
+REDRAW_EVENTS = {
+    STATE_EVENT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN,
+    pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWRESTORED,
+}
+
+def server_addresses():
+    """SKYJO_SERVER, or the local server's Unix socket if there is one, then TCP"""
+    address = os.environ.get("SKYJO_SERVER")
+    if address:
+        return [address]
+    addresses = []
+    unix_path = default_unix_path(PORT)
+    if HOST == 'localhost' and unix_sockets_supported() and os.path.exists(unix_path):
+        # May be the stale socket file of a server that is gone, TCP is tried next
+        addresses.append(f"unix://{unix_path}")
+    addresses.append(f"tcp://{HOST}:{PORT}")
+    return addresses
+
+def wake_ui():
+    """Called from the connection thread; the main loop picks up what changed"""
+    try:
+        pygame.event.post(pygame.event.Event(STATE_EVENT))
+    except pygame.error:
+        pass  # Window already closed
+
+connection = ServerConnection(server_addresses, on_change=wake_ui)
 
 # Game state variables
-deck_images = load_card_images()
 player_name = ""
-game_state = {}
-buttons = []
-card_rects = {}
+game_state = {}  # Shown state: the server's, with our unconfirmed moves applied
+predictor = Predictor()
+widgets = WidgetLayer()
 
 def gui_register_player():
     """Handle player registration GUI"""
@@ -32,7 +67,6 @@ def gui_register_player():
     pygame.init()
     screen = pygame.display.set_mode((800, 600), pygame.RESIZABLE)
     pygame.display.set_caption("Skyjo - Player Registration")
-    font = pygame.font.SysFont(None, 32)
     clock = pygame.time.Clock()
 
     input_box = pygame.Rect(50, 200, 300, 40)
@@ -43,17 +77,20 @@ def gui_register_player():
     text = ''
 
     # Buttons for player count selection
-    button_font = pygame.font.SysFont(None, 36)
     player_count_buttons = {
         2: pygame.Rect(50, 100, 80, 40),
         3: pygame.Rect(150, 100, 80, 40),
         4: pygame.Rect(250, 100, 80, 40),
     }
 
-    # Get initial message from server
-    expecting = client.recv(1024).decode()
+    # Connect in the background, the window stays responsive meanwhile
+    connection.start()
+    expecting = None
 
     while True:
+        if expecting is None:
+            expecting = connection.prompt
+        
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -64,7 +101,7 @@ def gui_register_player():
                 if expecting == "choose_players":
                     for count, rect in player_count_buttons.items():
                         if rect.collidepoint(event.pos):
-                            client.sendall(str(count).encode())
+                            connection.send_raw(str(count).encode())
                             expecting = "enter_name"
                             break
 
@@ -76,9 +113,9 @@ def gui_register_player():
                 color = color_active if active else color_inactive
 
             if event.type == pygame.KEYDOWN and active:
-                if event.key == pygame.K_RETURN and text.strip():
+                if event.key == pygame.K_RETURN and text.strip() and expecting == "enter_name":
                     player_name = text.strip()
-                    client.sendall(player_name.encode())
+                    connection.register(player_name)
                     return
                 elif event.key == pygame.K_BACKSPACE:
                     text = text[:-1]
@@ -87,105 +124,111 @@ def gui_register_player():
 
         screen.fill((30, 30, 30))
 
+        if expecting is None:
+            # Still connecting, or could not
+            if connection.status == "connecting":
+                label = render_text("Connecting to server...", 32, (255, 255, 255))
+            else:
+                label = render_text(f"Could not connect: {connection.error}", 24, (255, 100, 100))
+            screen.blit(label, (50, 50))
+
         # Draw player count selection
         if expecting == "choose_players":
-            label = font.render("Choose number of players:", True, (255, 255, 255))
+            label = render_text("Choose number of players:", 32, (255, 255, 255))
             screen.blit(label, (50, 50))
             for count, rect in player_count_buttons.items():
                 pygame.draw.rect(screen, (0, 128, 0), rect)
-                txt = button_font.render(str(count), True, (255, 255, 255))
+                txt = render_text(str(count), 36, (255, 255, 255))
                 screen.blit(txt, (rect.x + 20, rect.y + 5))
 
         # Draw name input
         if expecting == "enter_name":
-            label = font.render("Enter your name:", True, (255, 255, 255))
+            label = render_text("Enter your name:", 32, (255, 255, 255))
             screen.blit(label, (50, 160))
-            txt_surface = font.render(text, True, color)
+            txt_surface = render_text(text, 32, color)
             screen.blit(txt_surface, (input_box.x + 5, input_box.y + 5))
             pygame.draw.rect(screen, color, input_box, 2)
 
         pygame.display.flip()
         clock.tick(30)
 
-def receive_data():
-    """Receive game state updates from server"""
+def update_game_state():
+    """Take the newest state from the connection, returns whether the shown state changed"""
     global game_state
-    while True:
-        try:
-            data = client.recv(4096).decode()
-            if data:
-                # Handle multiple JSON messages in one packet
-                messages = data.strip().split('\n')
-                for message in messages:
-                    if message:
-                        try:
-                            game_state = json.loads(message)
-                        except json.JSONDecodeError:
-                            print(f"Invalid JSON received: {message}")
-        except Exception as e:
-            print(f"Error receiving data from server: {e}")
-            break
+    state = connection.states.take()
+    if state is None:
+        if not predictor.expire():
+            return False
+        # The server never answered the move; make sure the state we fall back to is current
+        request_state()
+    else:
+        predictor.reconcile(state)
+    game_state = predictor.state
+    return True
 
 def setup_buttons(screen):
-    """Setup UI buttons based on current game state"""
-    global buttons
-    buttons = []
-    
-    if not game_state:
-        return
-    
-    board_info = game_state.get('board_info', {})
-    current_player_index = board_info.get('current_player', -1)
-    state = board_info.get('state', '')
-    phase = board_info.get('phase', '')
-    
-    # Get current player name
-    players = list(game_state.get('players', {}).keys())
-    current_player_name = players[current_player_index] if 0 <= current_player_index < len(players) else ""
-    
-    # Only show buttons if it's the player's turn
-    if current_player_name != player_name:
-        return
-    
-    screen_width, screen_height = screen.get_size()
-    button_width = 120
-    button_height = 35
-    spacing = 10
-    y = screen_height - button_height - 20
-    
-    # Buttons based on game state and phase
-    if state == "playing" or state == "end_round":
-        if phase == "choose_pile":
-            # Choose between draw pile and discard pile
-            buttons.append(Button(50, y, button_width, button_height, "Draw Deck", 
-                                lambda: send_action("draw_from_deck")))
-            buttons.append(Button(50 + button_width + spacing, y, button_width, button_height, "Take Discard", 
-                                lambda: send_action("draw_from_discard")))
+    """The action buttons for the current game state, only rebuilt when they change"""
+    specs = ()
+    layout = None
+    if game_state:
+        board_info = game_state.get('board_info', {})
+        current_player_index = board_info.get('current_player', -1)
+        state = board_info.get('state', '')
+        phase = board_info.get('phase', '')
+        
+        # Get current player name
+        players = list(game_state.get('players', {}).keys())
+        current_player_name = players[current_player_index] if 0 <= current_player_index < len(players) else ""
         
-        elif phase == "decide_card":
-            # Decide what to do with drawn card
-            buttons.append(Button(50, y, button_width, button_height, "Keep Card", 
-                                lambda: send_action("keep_card")))
-            buttons.append(Button(50 + button_width + spacing, y, button_width, button_height, "Discard Card", 
-                                lambda: send_action("discard_card")))
+        # Only show buttons if it's the player's turn
+        if current_player_name == player_name:
+            if state == "playing" or state == "end_round":
+                specs = PHASE_BUTTONS.get(phase, ())
+            elif state == "round_end":
+                specs = NEW_ROUND_BUTTON
+            layout = get_layout(screen.get_size(), len(players))
     
-    elif state == "round_end":
-        # Option to start new round
-        buttons.append(Button(50, y, button_width * 2, button_height, "Start New Round", 
-                            lambda: send_action("start_new_round")))
+    # The layout changes with the window size, so resizing also rebuilds them
+    return widgets.show((specs, layout), build_buttons, specs, layout)
+
+def build_buttons(specs, layout):
+    rects = [layout.wide_button] if specs is NEW_ROUND_BUTTON else layout.buttons
+    return [Button(*rect, label, functools.partial(send_action, action))
+            for rect, (label, action) in zip(rects, specs)]
+
+def request_state():
+    """Ask the server for the current state, sending the version we already have"""
+    action_data = {'action': 'get_state'}
+    if predictor.confirmed:
+        action_data['version'] = predictor.confirmed.get('version')
+    connection.send(action_data)
 
 def send_action(action, row=None, col=None):
-    """Send action to server"""
+    """Send action to server, and show its predicted outcome until the server answers"""
+    global game_state
     action_data = {'action': action}
     if row is not None:
         action_data['row'] = row
     if col is not None:
         action_data['col'] = col
     
-    try:
-        client.sendall(json.dumps(action_data).encode())
-    except Exception as e:
-        print(f"Error sending action: {e}")
+    connection.send(action_data)
+    if predictor.predict(player_name, action, row, col):
+        game_state = predictor.state
+
+def own_card_at(layout, pos):
+    """(row, col) of our own card under pos, or None"""
+    hit = layout.card_at(pos) if layout else None
+    if not hit:
+        return None
+    player, row, col = hit
+    players = list(game_state.get('players', {}).items())
+    if player >= len(players) or players[player][0] != player_name:
+        return None
+    grid = players[player][1].get('grid', [])
+    if row >= len(grid) or col >= len(grid[row]) or grid[row][col] is None:
+        return None  # Removed column
+    return row, col
 
 def handle_card_click(row, col):
     """Handle clicking on a card"""
@@ -223,81 +266,61 @@ def is_game_over():
 
 def game_loop():
     """Main game loop with basic UI"""
-    global player_name, card_rects
+    global player_name
     pygame.init()
     screen = pygame.display.set_mode((1200, 700), pygame.RESIZABLE)
     pygame.display.set_caption("Skyjo")
-    clock = pygame.time.Clock()
+    # Loaded after set_mode so the cards are converted to the display format
+    renderer = Renderer(screen, load_card_images())
+    redraw = True
+    reported = False
 
     while True:
-        # Handle events first
-        for event in pygame.event.get():
+        if update_game_state():
+            redraw = True
+        if connection.status in ("closed", "failed") and not reported:
+            print(f"Error receiving data from server: {connection.error}")
+            reported = True
+        if redraw:
+            # Repaint only what changed since the last frame
+            renderer.draw(game_state, player_name, setup_buttons(screen))
+            redraw = False
+
+        # Sleep until something happens, then handle everything that is queued
+        first = pygame.event.wait(IDLE_WAKEUP_MS)
+        for event in [first] + pygame.event.get():
+            if event.type in REDRAW_EVENTS:
+                redraw = True
+            
+            # Hover, press and clicks on the action buttons
+            consumed, changed = widgets.handle_event(event)
+            redraw = redraw or changed
+            
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
             
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWRESTORED):
+                # The window contents are gone or the layout moved
+                renderer.invalidate()
+            
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE and is_game_over():
                     # Return to menu or exit
                     pygame.quit()
                     sys.exit()
             
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # Handle game action buttons
-                for btn in buttons:
-                    if btn.rect.collidepoint(event.pos):
-                        btn.callback()
-                        break
-                else:
-                    # Handle card clicks if no button was clicked
-                    row_col = get_clicked_card(event.pos, card_rects)
-                    if row_col:
-                        row, col = row_col
-                        handle_card_click(row, col)
-
-        # Clear screen
-        screen.fill((0, 100, 0))  # Dark green background
-        
-        if game_state:
-            # Check if game is over
-            if is_game_over():
-                draw_game_over_screen(screen, game_state)
-            else:
-                # Draw normal game elements
-                players_data = game_state.get('players', {})
-                
-                # Get current player name for turn highlighting
-                board_info = game_state.get('board_info', {})
-                current_player_index = board_info.get('current_player', -1)
-                players = list(players_data.keys())
-                current_player_name = players[current_player_index] if 0 <= current_player_index < len(players) else ""
-                
-                # Draw player grids with turn highlighting
-                card_rects = draw_player_grids(screen, players_data, player_name, deck_images, current_player_name)
-                
-                # Draw game info
-                draw_game_info(screen, game_state, player_name)
-                
-                # Draw held card
-                draw_held_card(screen, game_state, deck_images)
-                
-                # Draw center area with deck and discard
-                draw_center_area(screen, game_state, deck_images)
-                
-                # Setup and draw action buttons
-                setup_buttons(screen)
-                for btn in buttons:
-                    btn.draw(screen)
-        else:
-            # Show waiting message
-            font = pygame.font.SysFont(None, 36)
-            text = font.render("Waiting for game to start...", True, (255, 255, 255))
-            screen.blit(text, (screen.get_width()//2 - text.get_width()//2, screen.get_height()//2))
+            if event.type == pygame.MOUSEBUTTONDOWN and not consumed:
+                # Handle card clicks if no button was clicked
+                row_col = own_card_at(renderer.layout, event.pos)
+                if row_col:
+                    row, col = row_col
+                    handle_card_click(row, col)
 
-        pygame.display.flip()
-        clock.tick(30)
+        if first.type == pygame.NOEVENT:
+            # Timed out; catch up in case a wakeup was lost
+            redraw = True
 
 if __name__ == "__main__":
     gui_register_player()
-    threading.Thread(target=receive_data, daemon=True).start()
     game_loop()
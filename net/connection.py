@@ -0,0 +1,234 @@
+"""The client's connection to the server, run off the UI thread.
+
+A background thread connects (retrying with backoff until a deadline),
+then does all socket I/O with a selector on a non-blocking socket:
+outgoing messages are queued by the UI and written when the socket is
+writable, heartbeats are sent while the game runs, and received states
+are handed over through a latest-value slot. When several states
+arrive at once (after a stall) only the newest is decoded. The UI never
+blocks on the network; it is woken by the on_change callback and reads
+status, prompt and the newest state when it redraws.
+"""
+import codecs
+import collections
+import json
+import selectors
+import socket
+import threading
+import time
+
+from net.transport import connect
+
+CONNECT_TIMEOUT = 3  # Seconds for one connection attempt
+CONNECT_DEADLINE = 30  # Seconds of retrying before giving up
+RETRY_DELAYS = (0.25, 0.5, 1, 2)  # Between attempts, the last one repeats
+HEARTBEAT_INTERVAL = 5  # Seconds between pings; the server drops clients silent for much longer
+PROMPTS = ("choose_players", "enter_name")
+RECV_SIZE = 65536
+HEARTBEAT_LINE = json.dumps({"heartbeat": True})  # As the server sends it, skipped undecoded
+
+
+class LatestValue:
+    """Slot holding only the newest value put into it.
+
+    One thread puts, another takes; neither waits for the other. A put
+    replaces the slot's (sequence, value) tuple in a single assignment, so
+    the taker always sees a consistent pair.
+    """
+
+    def __init__(self):
+        self._item = (0, None)
+        self._taken = 0
+
+    def put(self, value):
+        self._item = (self._item[0] + 1, value)
+
+    def take(self):
+        """The newest value if it was not taken yet, else None"""
+        sequence, value = self._item
+        if sequence == self._taken:
+            return None
+        self._taken = sequence
+        return value
+
+
+class ServerConnection:
+    """Connects to the first reachable address and exchanges messages in the background"""
+
+    def __init__(self, addresses, on_change=None):
+        self.addresses = addresses  # Called before every attempt, returns addresses to try in order
+        self.on_change = on_change or (lambda: None)
+        self.status = "connecting"  # Then "connected", and "failed" or "closed" at the end
+        self.error = None
+        self.prompt = None  # Registration step the server asked for
+        self.states = LatestValue()
+        self.registered = False
+        self.stale_states = 0  # Messages never decoded because a newer state came with them
+        self.unmodified = 0  # get_state replies saying the state we have is the newest
+        self._outgoing = collections.deque()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._closing = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="connection")
+        self._thread.start()
+
+    def send(self, message):
+        """Queue a JSON message"""
+        self.send_raw(json.dumps(message).encode())
+
+    def send_raw(self, data):
+        """Queue raw bytes, used for the registration replies"""
+        self._outgoing.append(data)
+        self._wake()
+
+    def register(self, name):
+        """Send our name, the last registration step; heartbeats start afterwards"""
+        self.send_raw(name.encode())
+        self.registered = True
+
+    def close(self):
+        self._closing = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass  # Socket buffer full, the loop wakes up anyway
+
+    def _set_status(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.on_change()
+
+    def _connect(self):
+        """A transport to the first address that answers, or None after the deadline"""
+        deadline = time.monotonic() + CONNECT_DEADLINE
+        attempt = 0
+        while not self._closing:
+            for address in self.addresses():
+                try:
+                    return connect(address, CONNECT_TIMEOUT)
+                except OSError as e:
+                    self.error = f"{address}: {e}"
+            delay = RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)]
+            attempt += 1
+            if time.monotonic() + delay > deadline:
+                return None
+            time.sleep(delay)
+        return None
+
+    def _run(self):
+        transport = self._connect()
+        if transport is None:
+            self._set_status("failed", self.error)
+            return
+        sock = getattr(transport, "sock", None)
+        if sock is None:
+            # The loop selects on a socket; in-process transports have none
+            transport.close()
+            self._set_status("failed", f"{transport.peer}: not a socket transport")
+            return
+        try:
+            self._set_status("connected")
+            self._loop(sock)
+        except OSError as e:
+            self._set_status("closed", str(e))
+        finally:
+            transport.close()
+
+    def _loop(self, sock):
+        sock.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        selector.register(self._wake_reader, selectors.EVENT_READ)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        buffer = ""
+        pending = b""  # Bytes of queued messages not yet written
+        next_ping = time.monotonic() + HEARTBEAT_INTERVAL
+        writing = False
+
+        while not self._closing:
+            timeout = max(0, next_ping - time.monotonic()) if self.registered else None
+            for key, ready in selector.select(timeout):
+                if key.fileobj is self._wake_reader:
+                    self._wake_reader.recv(4096)
+                    continue
+                if ready & selectors.EVENT_READ:
+                    # Read everything there is, so a backlog is handled in one go
+                    chunks = []
+                    while True:
+                        try:
+                            data = sock.recv(RECV_SIZE)
+                        except BlockingIOError:
+                            break
+                        if not data:
+                            self._set_status("closed", "Server closed the connection")
+                            return
+                        chunks.append(data)
+                    if chunks:
+                        buffer = self._received(buffer + decoder.decode(b"".join(chunks)))
+
+            if self.registered and time.monotonic() >= next_ping:
+                self._outgoing.append(json.dumps({'action': 'ping'}).encode())
+                next_ping = time.monotonic() + HEARTBEAT_INTERVAL
+
+            while self._outgoing:
+                pending += self._outgoing.popleft()
+            if pending:
+                try:
+                    pending = pending[sock.send(pending):]
+                except BlockingIOError:
+                    pass
+            # Only wait for writability while something is left to write
+            if bool(pending) != writing:
+                writing = bool(pending)
+                events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+                selector.modify(sock, events)
+        selector.close()
+
+    def _received(self, buffer):
+        """Handle the complete messages in buffer, returns the incomplete rest"""
+        if self.prompt is None:
+            # The registration prompt is a plain word without a newline
+            if buffer in PROMPTS:
+                self.prompt = buffer
+                self.on_change()
+                return ""
+            if any(prompt.startswith(buffer) for prompt in PROMPTS):
+                return buffer  # Cut off, wait for the rest
+        end = buffer.rfind("\n")
+        if end < 0:
+            return buffer
+        rest = buffer[end + 1:]
+        # Only the newest state counts: walk the complete lines backwards and
+        # decode until the first real state, everything before it is stale
+        latest = None
+        while end >= 0:
+            start = buffer.rfind("\n", 0, end) + 1
+            line = buffer[start:end]
+            end = start - 1
+            if latest is not None:
+                if line and line != HEARTBEAT_LINE:
+                    self.stale_states += 1
+                continue
+            if not line or line == HEARTBEAT_LINE:
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Invalid JSON received: {line}")
+                continue
+            if message.get("not_modified"):
+                # Our copy is current, nothing to take
+                self.unmodified += 1
+                continue
+            if message.get("heartbeat"):
+                continue
+            latest = message
+        if latest is not None:
+            self.states.put(latest)
+            self.on_change()
+        return rest
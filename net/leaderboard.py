@@ -0,0 +1,300 @@
+"""Persistent leaderboard of finished games.
+
+Results are stored in SQLite in WAL mode, so readers never block the
+writer and several server processes can share one file. Games are queued
+by the game thread and written in batches by a background thread, so
+finishing a game never waits for the disk.
+
+Top-K queries walk the rating index of the players table. Rank queries use
+an in-memory Fenwick tree over rating buckets, so both are logarithmic in
+the number of players. The writer applies its own rating changes to the
+tree; the tree is reloaded from the table only when another process wrote
+to the file (PRAGMA data_version), so ranks stay right with shared files.
+
+Example:
+    python net/leaderboard.py top 10
+    python net/leaderboard.py rank Alice
+"""
+import argparse
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_RATING = 1500.0
+K_FACTOR = 32.0
+RATING_RESOLUTION = 10  # Rank buckets per rating point
+MAX_RATING = 4000  # Ratings are clamped to [0, MAX_RATING] for ranking
+BATCH_SIZE = 256  # Games written per transaction at most
+BATCH_WAIT = 0.5  # Seconds the writer waits to fill a batch
+
+# Part of the server's structured log (net/log.py) when it is set up
+log = logging.getLogger("skyjo.leaderboard")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    rounds INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    name TEXT NOT NULL,
+    total_score INTEGER NOT NULL,
+    rank INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_name ON results(name);
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    wins REAL NOT NULL,
+    total_score INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    rating REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_by_rating ON players(rating DESC, name);
+"""
+
+
+class RankIndex:
+    """Fenwick tree counting players per rating bucket"""
+
+    def __init__(self):
+        self.size = MAX_RATING * RATING_RESOLUTION + 1
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def bucket(self, rating):
+        return int(min(max(rating, 0), MAX_RATING) * RATING_RESOLUTION)
+
+    def add(self, rating, delta=1):
+        self.total += delta
+        i = self.bucket(rating) + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_up_to(self, bucket):
+        """Players in buckets 0..bucket"""
+        count = 0
+        i = bucket + 1
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def rank(self, rating):
+        """1-based rank of a rating; equal buckets share a rank"""
+        return self.total - self.count_up_to(self.bucket(rating)) + 1
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def game_placings(scores):
+    """Rank players by total score, lowest first; ties share a rank"""
+    ordered = sorted(scores.values())
+    return {name: ordered.index(score) + 1 for name, score in scores.items()}
+
+
+def rating_changes(scores, ratings):
+    """Pairwise Elo updates for a multi-player game (lower score wins)"""
+    names = list(scores)
+    k = K_FACTOR / max(1, len(names) - 1)
+    changes = {name: 0.0 for name in names}
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            expected = 1 / (1 + 10 ** ((ratings[b] - ratings[a]) / 400))
+            actual = 1.0 if scores[a] < scores[b] else 0.5 if scores[a] == scores[b] else 0.0
+            changes[a] += k * (actual - expected)
+            changes[b] -= k * (actual - expected)
+    return changes
+
+
+class Leaderboard:
+    """Records finished games and answers top-K and rank queries"""
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()  # Guards the read connection and the rank index
+        self.conn = _connect(path)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self.index = RankIndex()
+        self.index_version = None  # data_version of the read connection the index matches
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def attach(self, rules):
+        """Record the game of a Rules object when it ends"""
+        def on_event(event, **data):
+            if event == "game_over":
+                self.record_game(data["scores"], data["rounds"])
+        rules.add_listener(on_event)
+
+    def record_game(self, scores, rounds=0):
+        """Queue a finished game's {name: total_score}; never blocks"""
+        self.queue.put((dict(scores), rounds, time.time()))
+
+    def flush(self):
+        """Wait until every queued game is written"""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+        self.conn.close()
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            deadline = time.monotonic() + BATCH_WAIT
+            while item is not None and len(batch) < BATCH_SIZE:
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            games = [game for game in batch if game is not None]
+            try:
+                if games:
+                    self._write_batch(conn, games)
+            except sqlite3.Error as e:
+                log.error("leaderboard_write_failed", extra={"fields": {"error": str(e), "games": len(games)}})
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if len(games) < len(batch):
+                conn.close()
+                return
+
+    def _write_batch(self, conn, games):
+        moves = []  # (old rating or None, new rating) of every player update, in order
+        with conn:
+            # Holding the write lock, so nobody commits until we do
+            conn.execute("BEGIN IMMEDIATE")
+            with self.lock:
+                fresh = self._data_version(self.conn) == self.index_version
+            # Changes only with other processes' commits, never with this connection's
+            before = self._data_version(conn)
+            for scores, rounds, finished_at in games:
+                game_id = conn.execute("INSERT INTO games (finished_at, rounds) VALUES (?, ?)",
+                                       (finished_at, rounds)).lastrowid
+                placings = game_placings(scores)
+                conn.executemany(
+                    "INSERT INTO results (game_id, name, total_score, rank) VALUES (?, ?, ?, ?)",
+                    [(game_id, name, score, placings[name]) for name, score in scores.items()])
+                # Read ratings inside the transaction so other processes' games count too
+                ratings = {}
+                known = set()
+                for name in scores:
+                    row = conn.execute("SELECT rating FROM players WHERE name = ?", (name,)).fetchone()
+                    ratings[name] = row[0] if row else DEFAULT_RATING
+                    if row:
+                        known.add(name)
+                changes = rating_changes(scores, ratings)
+                for name, score in scores.items():
+                    rating = ratings[name] + changes[name]
+                    moves.append((ratings[name] if name in known else None, rating))
+                    conn.execute(
+                        "INSERT INTO players (name, games, wins, total_score, best_score, rating) "
+                        "VALUES (?, 1, ?, ?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET games = games + 1, wins = wins + excluded.wins, "
+                        "total_score = total_score + excluded.total_score, "
+                        "best_score = MIN(best_score, excluded.best_score), rating = excluded.rating",
+                        (name, 1.0 if placings[name] == 1 else 0.0, score, score, rating))
+        with self.lock:
+            # Read first: if nobody else committed by the second check, this
+            # version differs from the old one by our commit alone
+            version = self._data_version(self.conn)
+            if fresh and self._data_version(conn) == before:
+                for old, new in moves:
+                    if old is not None:
+                        self.index.add(old, -1)
+                    self.index.add(new)
+                self.index_version = version
+
+    @staticmethod
+    def _data_version(conn):
+        """Changes with every commit to the file by another connection than conn"""
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh_index(self):
+        """Reload the rank index if another process wrote since it was updated (lock held)"""
+        version = self._data_version(self.conn)
+        if version == self.index_version:
+            return
+        index = RankIndex()
+        for (rating,) in self.conn.execute("SELECT rating FROM players"):
+            index.add(rating)
+        self.index = index
+        self.index_version = version
+
+    def top(self, k=10):
+        """The k best players as dicts, best first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT name, games, wins, total_score, best_score, rating FROM players "
+                "ORDER BY rating DESC, name LIMIT ?", (k,)).fetchall()
+        return [dict(zip(("name", "games", "wins", "total_score", "best_score", "rating"), row)) for row in rows]
+
+    def rank(self, name):
+        """1-based rank of a player by rating, or None if unknown"""
+        with self.lock:
+            self._refresh_index()
+            row = self.conn.execute("SELECT rating FROM players WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            return self.index.rank(row[0])
+
+    def player(self, name):
+        """Aggregate stats of one player, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT name, games, wins, total_score, best_score, rating FROM players WHERE name = ?",
+                (name,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("name", "games", "wins", "total_score", "best_score", "rating"), row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the Skyjo leaderboard")
+    parser.add_argument("--db", default=os.environ.get("SKYJO_LEADERBOARD", "leaderboard.db"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    top = commands.add_parser("top")
+    top.add_argument("k", type=int, nargs="?", default=10)
+    rank = commands.add_parser("rank")
+    rank.add_argument("name")
+    args = parser.parse_args(argv)
+
+    leaderboard = Leaderboard(args.db)
+    try:
+        if args.command == "top":
+            for position, row in enumerate(leaderboard.top(args.k), 1):
+                print(f"{position:>4}. {row['name']:<20} {row['rating']:7.1f}  "
+                      f"games {row['games']:<5} wins {row['wins']:<5.0f} best {row['best_score']}")
+        else:
+            position = leaderboard.rank(args.name)
+            if position is None:
+                print(f"{args.name} has no finished games")
+                return 1
+            stats = leaderboard.player(args.name)
+            print(f"{args.name}: rank {position} of {leaderboard.index.total}, rating {stats['rating']:.1f}")
+    finally:
+        leaderboard.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Structured event logging for the server processes.
+
+Events are logged as a name plus fields, e.g.
+    log.event("action", table=3, player="bob", action="flip_card", latency_us=180)
+
+The calling thread only puts the record on a queue; a background listener
+thread formats it and writes one JSON object per line to a rotating file,
+plus a short text line to the console. Noisy events are sampled: only
+every Nth one is logged, with "sampled": N in its fields. Until
+setup_logging() is called nothing below WARNING is logged, which keeps
+benchmarks and tools quiet.
+"""
+import atexit
+import collections
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+LOG_PATH = os.environ.get("SKYJO_LOG", "skyjo.log")  # Empty for console only
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# Log one in N of these events; the exact counts are in the rejection counters
+SAMPLE_EVERY = {
+    "action_failed": 20,
+    "message_rejected": 100,
+    "unknown_action": 20,
+}
+
+ROOT = "skyjo"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, event and fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Short human readable line for the console"""
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        text = " ".join(f"{key}={value}" for key, value in fields.items())
+        clock = time.strftime("%H:%M:%S", time.localtime(record.created))
+        return f"{clock} {record.getMessage()} {text}".rstrip()
+
+
+class EventLogger:
+    """Logs named events with fields, sampling the noisy ones"""
+
+    def __init__(self, name, sample_every=None):
+        self.logger = logging.getLogger(f"{ROOT}.{name}")
+        self.sample_every = SAMPLE_EVERY if sample_every is None else sample_every
+        self._seen = collections.Counter()
+
+    def event(self, event, level=logging.INFO, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        every = self.sample_every.get(event)
+        if every:
+            # Unlocked on purpose: an occasional lost count only shifts the sample
+            self._seen[event] += 1
+            if (self._seen[event] - 1) % every:
+                return
+            fields["sampled"] = every
+        self.logger.log(level, event, extra={"fields": fields})
+
+    def warning(self, event, **fields):
+        self.event(event, logging.WARNING, **fields)
+
+    def error(self, event, **fields):
+        self.event(event, logging.ERROR, **fields)
+
+
+def get_logger(name):
+    return EventLogger(name)
+
+
+_listener = None
+
+
+def setup_logging(path=LOG_PATH, level=logging.INFO, console=True):
+    """Start the background writer; call once per process"""
+    global _listener
+    if _listener is not None:
+        return
+    handlers = []
+    if path:
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(TextFormatter())
+        handlers.append(console_handler)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger(ROOT)
+    root.setLevel(level)
+    root.propagate = False
+    root.addHandler(logging.handlers.QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out queued records and stop the writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
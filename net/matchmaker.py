@@ -0,0 +1,333 @@
+"""Matchmaker that groups waiting players into tables and hands each table
+to the least-loaded game-server worker process.
+
+Players connect to the matchmaker exactly as they would to a standalone
+server: it asks for the wanted player count and the name, then queues them
+in the bucket for that count. Buckets are FIFO, and when several buckets
+can fill a table the one whose first player has waited longest goes first.
+A full table's sockets are passed to a worker process over a Unix socket
+pair (SCM_RIGHTS), so game traffic never goes through the matchmaker. Workers
+report their load back over the same socket pair. Queued sockets are
+watched, so players who leave while waiting are dropped from the queue.
+
+Example:
+    python net/matchmaker.py --workers 4
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from net.leaderboard import Leaderboard
+from net.log import LOG_PATH, get_logger, setup_logging
+from net.protocol import decode_messages
+from net.server import JOIN_TIMEOUT, LEADERBOARD_PATH, MAX_FRAME, REJECTIONS, GameTable, start_admin
+from net.transport import SocketTransport, listen
+
+HOST = 'localhost'
+PORT = 12345
+PLAYER_COUNTS = (2, 3, 4)  # The choices offered by gui_register_player
+MAX_FDS = max(PLAYER_COUNTS)
+QUEUE_POLL = 1.0  # Seconds between retries of queued connections holding half a message
+
+log = get_logger("matchmaker")
+
+
+def _send_line(sock, message, fds=()):
+    data = (json.dumps(message) + "\n").encode()
+    if fds:
+        socket.send_fds(sock, [data], list(fds))
+    else:
+        sock.sendall(data)
+
+
+class GameWorker:
+    """Runs tables handed over by the matchmaker, inside a worker process"""
+
+    def __init__(self, worker_id, control, leaderboard_path=None):
+        self.worker_id = worker_id
+        self.control = control  # Our end of the socket pair to the matchmaker
+        self.tables = set()
+        self.lock = threading.Lock()
+        # Workers share the leaderboard file; SQLite serializes their writes
+        self.leaderboard = Leaderboard(leaderboard_path) if leaderboard_path else None
+
+    def report_load(self):
+        with self.lock:
+            load = {"worker": self.worker_id, "tables": len(self.tables),
+                    "players": sum(len(table.player_names) for table in self.tables),
+                    "rejections": dict(REJECTIONS)}
+        try:
+            _send_line(self.control, load)
+        except OSError:
+            pass  # The matchmaker is gone; the tables keep running until they end
+
+    def run(self):
+        buffer = b""
+        admin = start_admin()
+        self.report_load()
+        while True:
+            data, fds, _, _ = socket.recv_fds(self.control, 65536, MAX_FDS)
+            if not data:
+                break
+            buffer += data
+            # A table message and its descriptors arrive in a single sendmsg
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                self.start_table(json.loads(line), fds)
+        admin.close()
+
+    def start_table(self, message, fds):
+        names = message["names"]
+        table = GameTable(len(names))
+        table.on_close = self.close_table
+        if self.leaderboard:
+            self.leaderboard.attach(table.rules)
+        conns = [SocketTransport(socket.socket(fileno=fd)) for fd in fds]
+        for conn, name in zip(conns, names):
+            table.add_player(conn, name)
+        with self.lock:
+            self.tables.add(table)
+        for conn, name in zip(conns, names):
+            threading.Thread(target=table.play, args=(conn, name), daemon=True).start()
+        self.report_load()
+
+    def close_table(self, table):
+        with self.lock:
+            self.tables.discard(table)
+        self.report_load()
+
+
+def run_worker(worker_id, control, matchmaker_end, leaderboard_path):
+    """Entry point of a worker process"""
+    matchmaker_end.close()
+    if LOG_PATH:
+        # One file per worker, rotating files must not be shared between processes
+        root, ext = os.path.splitext(LOG_PATH)
+        setup_logging(f"{root}-worker{worker_id}{ext}", console=False)
+    GameWorker(worker_id, control, leaderboard_path).run()
+
+
+class WorkerHandle:
+    """The matchmaker's view of one worker process"""
+
+    def __init__(self, worker_id, leaderboard_path=None):
+        self.worker_id = worker_id
+        self.control, worker_end = socket.socketpair()
+        self.process = multiprocessing.Process(
+            target=run_worker, args=(worker_id, worker_end, self.control, leaderboard_path), daemon=True)
+        self.process.start()
+        worker_end.close()
+        self.tables = 0
+        self.players = 0
+        self.rejections = {}  # Rejected client messages by reason, as last reported
+        self.alive = True
+
+    def load(self):
+        return (self.players, self.tables)
+
+
+class Matchmaker:
+    """Queues players by requested table size and dispatches full tables"""
+
+    def __init__(self, workers=None, leaderboard_path=LEADERBOARD_PATH):
+        self.workers = [WorkerHandle(i, leaderboard_path) for i in range(workers or os.cpu_count() or 1)]
+        self.buckets = {count: collections.deque() for count in PLAYER_COUNTS}
+        self.lock = threading.Lock()
+        self.selector = selectors.DefaultSelector()  # Queued connections, data is (count, entry)
+        for worker in self.workers:
+            threading.Thread(target=self._read_reports, args=(worker,), daemon=True).start()
+        threading.Thread(target=self._watch_queue, daemon=True).start()
+
+    def _read_reports(self, worker):
+        buffer = b""
+        while True:
+            try:
+                data = worker.control.recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                report = json.loads(line)
+                with self.lock:
+                    worker.tables = report["tables"]
+                    worker.players = report["players"]
+                    worker.rejections = report["rejections"]
+        with self.lock:
+            worker.alive = False
+        log.error("worker_exited", worker=worker.worker_id)
+
+    def handle_player(self, conn, addr):
+        """Ask a new connection for its table size and name, then queue it"""
+        try:
+            conn.settimeout(JOIN_TIMEOUT)
+            conn.send("choose_players".encode())
+            count = int(conn.recv(1024).decode())
+            if count not in PLAYER_COUNTS:
+                raise ValueError(count)
+            name = conn.recv(1024).decode().strip()
+        except (ValueError, OSError) as e:
+            log.warning("registration_failed", addr=str(addr), error=str(e))
+            conn.close()
+            return
+        with self.lock:
+            waiting = [entry[1] for bucket in self.buckets.values() for entry in bucket]
+            if not name or name in waiting:
+                log.warning("registration_failed", reason="invalid or duplicate name", player=name)
+                conn.close()
+                return
+            entry = (conn, name, time.monotonic())
+            self.buckets[count].append(entry)
+            self.selector.register(conn, selectors.EVENT_READ, (count, entry))
+            log.event("queued", player=name, table_size=count)
+            tables = self._form_tables()
+        for players in tables:
+            self._dispatch(players)
+
+    def _form_tables(self):
+        """Take full tables out of the buckets, longest waiting first (lock held)"""
+        tables = []
+        while True:
+            ready = [(bucket[0][2], count) for count, bucket in self.buckets.items() if len(bucket) >= count]
+            if not ready:
+                return tables
+            _, count = min(ready)
+            bucket = self.buckets[count]
+            players = [bucket.popleft() for _ in range(count)]
+            for conn, _, _ in players:
+                self._unwatch(conn)
+            tables.append(players)
+
+    def _unwatch(self, conn):
+        """Stop watching a connection that leaves the queue (lock held)"""
+        try:
+            self.selector.unregister(conn)
+        except KeyError:
+            pass  # Set aside for holding half a message
+
+    def _watch_queue(self):
+        """Drop queued players whose connection closed while they waited"""
+        held = []  # Entries holding half a message, looked at again after QUEUE_POLL
+        while True:
+            events = self.selector.select(QUEUE_POLL)
+            with self.lock:
+                for count, entry in held:
+                    if entry in self.buckets[count]:
+                        self.selector.register(entry[0], selectors.EVENT_READ, (count, entry))
+            held = []
+            for key, _ in events:
+                count, entry = key.data
+                if self._check_queued(count, entry) == "partial":
+                    held.append((count, entry))
+
+    def _check_queued(self, count, entry):
+        """Handle a readable queued connection: EOF drops it, its pings are read and ignored"""
+        conn, name, _ = entry
+        with self.lock:
+            if entry not in self.buckets[count]:
+                return "gone"  # Dispatched meanwhile
+            try:
+                data = conn.sock.recv(MAX_FRAME, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return "queued"
+            except OSError:
+                data = b""
+            if data:
+                # Heartbeats of a waiting client; only whole messages are taken, so
+                # the game server starts reading at a message boundary
+                text = data.decode(errors="surrogateescape")
+                try:
+                    _, tail = decode_messages(text)
+                except json.JSONDecodeError:
+                    tail = None  # Not our protocol
+                if tail is not None:
+                    taken = len(data) - len(tail.encode(errors="surrogateescape"))
+                    if taken:
+                        conn.sock.recv(taken)
+                        return "queued"
+                    if len(data) < MAX_FRAME:
+                        # The rest is on its way; don't spin on it meanwhile
+                        self.selector.unregister(conn)
+                        return "partial"
+            self.buckets[count].remove(entry)
+            self._unwatch(conn)
+        conn.close()
+        log.event("left_queue", player=name, table_size=count)
+        return "gone"
+
+    def _pick_worker(self, players):
+        """Least-loaded live worker, counted as busier right away"""
+        with self.lock:
+            alive = [worker for worker in self.workers if worker.alive]
+            if not alive:
+                return None
+            worker = min(alive, key=WorkerHandle.load)
+            # Until the worker's own report arrives, assume the table landed
+            worker.tables += 1
+            worker.players += players
+            return worker
+
+    def _dispatch(self, players):
+        names = [name for _, name, _ in players]
+        while True:
+            worker = self._pick_worker(len(players))
+            if worker is None:
+                log.error("no_worker", players=names)
+                for conn, _, _ in players:
+                    conn.close()
+                return
+            try:
+                _send_line(worker.control, {"names": names}, [conn.fileno() for conn, _, _ in players])
+                break
+            except OSError as e:
+                # Died before its report thread noticed; try the next one
+                with self.lock:
+                    worker.alive = False
+                log.error("dispatch_failed", worker=worker.worker_id, error=str(e))
+        # The worker owns duplicates of the sockets now; a shutdown would end its connections too
+        for conn, _, _ in players:
+            conn.release()
+        log.event("table_dispatched", players=names, worker=worker.worker_id)
+
+    def serve(self, listener):
+        while True:
+            try:
+                conn, addr = listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.handle_player, args=(conn, addr), daemon=True).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Skyjo matchmaker with game-server workers")
+    parser.add_argument("--address", default=f"tcp://{HOST}:{PORT}", help="tcp:// or unix:// address")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    matchmaker = Matchmaker(args.workers)
+    # After the workers are forked, they start their own log writers
+    setup_logging()
+    listener = listen(args.address)
+    print(f"Skyjo matchmaker started on {listener.address} with {len(matchmaker.workers)} workers")
+    try:
+        matchmaker.serve(listener)
+    except KeyboardInterrupt:
+        print("\nMatchmaker shutting down...")
+    finally:
+        listener.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Optimistic prediction of the player's own moves.
+
+The client runs its own moves through the game rules on a copy of the
+state it was sent and shows the result right away, instead of waiting a
+round trip for the server. The server stays authoritative: every state
+it sends replaces the prediction. A prediction is confirmed when the
+server's state of the same version equals it, and rolled back (the
+server's state is shown) when it differs or when no state arrives in
+time, e.g. because the server refused the move.
+
+Only moves whose outcome the client can see in full are predicted.
+Drawing shows a card the client has not seen (the deck and the cards
+under the top discard are not sent), and the end of a round depends on
+bookkeeping the view leaves out, so those wait for the server.
+"""
+import time
+
+from game.deck import Deck
+from game.rules import Rules
+
+PREDICTION_TIMEOUT = 5  # Seconds until an unconfirmed move is rolled back
+UNPREDICTED_ACTIONS = ("draw_from_deck", "draw_from_discard", "start_new_round")
+PREDICTED_STATES = ("select_initial_cards", "playing")  # Before and after the move
+
+
+def rules_from_view(view):
+    """Rebuild a Rules object from a player's view of the game, without emitting events.
+
+    Cards the view does not show (deck, discard pile below the top card)
+    are placeholders that only keep the pile sizes right.
+    """
+    rules = Rules(0)
+    for name in view["players"]:
+        rules.add_player(name)
+    rules.deck = Deck.from_cards([0] * view.get("deck_size", 0))
+    discard_size = view.get("discard_size", 0)
+    for _ in range(discard_size - 1):
+        rules._push_discard(0)
+    if discard_size:
+        rules._push_discard(view["top_discard"])
+    rules.drawn_card = view.get("drawn_card")
+    rules.game_message = view.get("message", "")
+
+    board = rules.board
+    board_info = view["board_info"]
+    board.state = board_info["state"]
+    board.phase = board_info["phase"]
+    board.current_player_index = board_info["current_player"]
+    board.round_number = board_info["round_number"]
+    for player, data in zip(board.players, view["players"].values()):
+        for r in range(3):
+            for c in range(4):
+                player._set_cell(r, c, data["grid"][r][c], data["revealed"][r][c])
+        player.total_score = data["total_score"]
+    rules.version = view["version"]
+    return rules
+
+
+def predict_action(view, player_name, action, row=None, col=None):
+    """The view after player_name's action, or None if it cannot be predicted"""
+    if action in UNPREDICTED_ACTIONS or not view:
+        return None
+    if view.get("board_info", {}).get("state") not in PREDICTED_STATES:
+        return None
+    rules = rules_from_view(view)
+    if not rules.handle_action(player_name, action, row, col):
+        return None  # The server would refuse it as well
+    if rules.board.state not in PREDICTED_STATES:
+        return None  # Ended the round
+    return rules.get_game_state_for_player(player_name)
+
+
+class Predictor:
+    """The server's newest state with our unconfirmed moves applied on top"""
+
+    def __init__(self, timeout=PREDICTION_TIMEOUT):
+        self.timeout = timeout
+        self.confirmed = {}  # Newest state from the server
+        self.pending = []  # (expected version, predicted state, time sent), oldest first
+        self.predicted = 0
+        self.rollbacks = 0  # Predictions the server contradicted or never confirmed
+
+    @property
+    def state(self):
+        """The state to show"""
+        return self.pending[-1][1] if self.pending else self.confirmed
+
+    def predict(self, player_name, action, row=None, col=None):
+        """Apply a move just sent to the server, returns whether the shown state changed"""
+        predicted = predict_action(self.state, player_name, action, row, col)
+        if predicted is None:
+            return False
+        self.pending.append((predicted["version"], predicted, time.monotonic()))
+        self.predicted += 1
+        return True
+
+    def reconcile(self, state):
+        """Take a state from the server; predictions it confirms or contradicts are dropped"""
+        self.confirmed = state
+        version = state.get("version", 0)
+        settled = [p for p in self.pending if p[0] <= version]
+        if settled:
+            expected, predicted, _ = settled[-1]
+            if expected == version and predicted == state:
+                self.pending = self.pending[len(settled):]
+            else:
+                self.rollbacks += 1
+                self.pending = []
+
+    def expire(self):
+        """Roll back predictions the server did not confirm in time, returns whether any were"""
+        if self.pending and time.monotonic() - self.pending[0][2] > self.timeout:
+            self.rollbacks += 1
+            self.pending = []
+            return True
+        return False
@@ -0,0 +1,30 @@
+import json
+
+_decoder = json.JSONDecoder()
+
+
+def decode_messages(buffer):
+    """Split received text into the JSON objects it holds.
+
+    Clients send one JSON object per message without a separator, so one
+    recv can hold several of them, or the start of one. Returns the decoded
+    objects and the incomplete tail to keep for the next recv. Raises
+    json.JSONDecodeError for text that can never become valid JSON.
+    """
+    messages = []
+    position = 0
+    length = len(buffer)
+    while position < length:
+        while position < length and buffer[position].isspace():
+            position += 1
+        if position == length:
+            break
+        try:
+            message, position = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not buffer.rstrip().endswith("}"):
+                # Most likely cut off by the recv size, wait for the rest
+                return messages, buffer[position:]
+            raise
+        messages.append(message)
+    return messages, ""
@@ -0,0 +1,22 @@
+import time
+
+
+class TokenBucket:
+    """Allows rate events per second on average, in bursts of up to burst"""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.updated = clock()
+
+    def allow(self, cost=1):
+        """Take cost tokens if there are enough, returns False otherwise"""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
@@ -1,5 +1,7 @@
-import socket
+import collections
+import itertools
 import threading
+import socket
 import json
 import time
 import sys
@@ -7,47 +9,390 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from game.rules import Rules
+from bots.policies import GreedyPolicy
+from game.replay import ReplayWriter
+from game.slots import StateSlots
+from game.rules import ACTIONS, Rules
+from net.admin import AdminServer, rules_handlers
+from net.leaderboard import Leaderboard
+from net.log import get_logger, setup_logging
+from net.protocol import decode_messages
+from net.ratelimit import TokenBucket
+from net.transport import default_unix_path, listen, unix_sockets_supported
 
 HOST = 'localhost'
 PORT = 12345
+REPLAY_PATH = os.environ.get("SKYJO_REPLAYS")  # Record games to this archive when set
+LEADERBOARD_PATH = os.environ.get("SKYJO_LEADERBOARD", "leaderboard.db")  # Empty to disable
+STATE_PATH = os.environ.get("SKYJO_STATE")  # Keep live games in this slot file to survive restarts
+ADMIN_PATH = os.environ.get("SKYJO_ADMIN")  # Admin socket, skyjo-admin-<pid>.sock in the temp dir by default
 
-clients = []
-player_names = []
 MAX_PLAYERS = None
-lock = threading.Lock()
-rules = Rules()
 
-def send_game_state_to_all():
-    """Send updated game state to all connected clients"""
-    with lock:
-        for i, conn in enumerate(clients):
-            if i < len(player_names):
-                name = player_names[i]
+# Liveness settings, in seconds. Clients send a ping every HEARTBEAT_INTERVAL
+# and the server sends a heartbeat line to quiet connections just as often.
+HEARTBEAT_INTERVAL = float(os.environ.get("SKYJO_HEARTBEAT", 5))
+IDLE_TIMEOUT = float(os.environ.get("SKYJO_IDLE_TIMEOUT", 30))  # Silent connections are dropped
+TURN_TIMEOUT = float(os.environ.get("SKYJO_TURN_TIMEOUT", 90))  # 0 waits forever
+JOIN_TIMEOUT = float(os.environ.get("SKYJO_JOIN_TIMEOUT", 600))  # Registration and waiting for a full table
+AUTO_PLAY = os.environ.get("SKYJO_AUTO_PLAY", "1") != "0"  # Play timed-out turns instead of closing the table
+
+# Input limits. Client messages are tiny, so anything near MAX_FRAME bytes is abuse.
+MAX_FRAME = 1024
+CONNECTION_RATE = (20, 40)  # Messages per second and burst, per connection
+TABLE_RATE = (50, 100)  # The same for all connections of a table together
+PING_RATE = (2 / HEARTBEAT_INTERVAL, 3)  # Pings per connection, at twice the client's pace
+MAX_REJECTIONS = 500  # Rejected messages before a connection is dropped
+
+# Rejected client messages by reason, for all tables of this process
+REJECTIONS = collections.Counter()
+
+log = get_logger("server")
+_table_ids = itertools.count(1)
+
+HEARTBEAT = (json.dumps({"heartbeat": True}) + "\n").encode()
+
+class GameTable:
+    """One game and the connections of the players seated at it"""
+
+    def __init__(self, max_players=None, rules=None, idle_timeout=IDLE_TIMEOUT,
+                 turn_timeout=TURN_TIMEOUT, auto_play=AUTO_PLAY,
+                 rate_limit=CONNECTION_RATE, table_rate_limit=TABLE_RATE):
+        self.rules = rules if rules is not None else Rules()
+        self.table_id = next(_table_ids)
+        self.max_players = max_players
+        self.clients = []
+        self.player_names = []
+        self.lock = threading.Lock()
+        self.on_close = None  # Called once every seated player has left
+        self.idle_timeout = idle_timeout
+        self.turn_timeout = turn_timeout
+        # Timed-out turns are played by a bot for the absent player
+        self.auto_player = GreedyPolicy(self.rules.seed) if auto_play else None
+        self.closed = False
+        self.last_sent = time.monotonic()
+        self._turn_version = None
+        self._turn_started = time.monotonic()
+        self.rate_limit = rate_limit  # (rate, burst) for each connection, None for no limit
+        self.bucket = TokenBucket(*table_rate_limit) if table_rate_limit else None
+        self.rejections = collections.Counter()
+        self.resumed = False  # Restored after a server restart, waiting for its players to come back
+        self.created = time.monotonic()
+
+    def send_game_state_to_all(self):
+        """Send updated game state to all connected clients"""
+        with self.lock:
+            self.last_sent = time.monotonic()
+            for i, conn in enumerate(self.clients):
+                if i < len(self.player_names):
+                    name = self.player_names[i]
+                    try:
+                        conn.send(self.rules.get_encoded_state_for_player(name))
+                    except Exception as e:
+                        log.warning("send_failed", table=self.table_id, player=name, error=str(e))
+                        self._drop(conn)
+
+    def send_heartbeat(self):
+        """Tell quiet connections the server is still there"""
+        with self.lock:
+            self.last_sent = time.monotonic()
+            for conn in list(self.clients):
                 try:
-                    state = rules.get_game_state_for_player(name)
-                    message = json.dumps(state) + '\n'
-                    conn.send(message.encode())
+                    conn.send(HEARTBEAT)
+                except Exception:
+                    self._drop(conn)
+
+    def _drop(self, conn):
+        """Forget a connection that failed (lock held); its play() thread cleans up"""
+        if conn in self.clients:
+            self.clients.remove(conn)
+        conn.close()
+
+    def add_player(self, conn, name):
+        """Seat a player, returns False for an empty or duplicate name"""
+        with self.lock:
+            if not name or name in self.player_names:
+                return False
+            if self.resumed:
+                # Only the players of the restored game may take its seats
+                if name not in [player.name for player in self.rules.board.players]:
+                    return False
+            else:
+                self.rules.add_player(name)
+            self.player_names.append(name)
+            self.clients.append(conn)
+        return True
+
+    def resume(self):
+        """Run a game restored from a state slot; its players rejoin by name"""
+        self.resumed = True
+        self.max_players = len(self.rules.board.players)
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def start_when_full(self):
+        """Start the game once all seats are taken (only one thread may start it)"""
+        with self.lock:
+            should_start = (self.rules.board.state == "waiting" and
+                            len(self.player_names) == self.max_players)
+            if should_start:
+                log.event("game_started", table=self.table_id, players=list(self.player_names),
+                          seed=self.rules.seed)
+                self.rules.start_game()
+        if should_start:
+            threading.Thread(target=self.watch, daemon=True).start()
+            self.send_game_state_to_all()
+
+    def watch(self):
+        """Send heartbeats and enforce the turn timeout until the table closes"""
+        while not self.closed:
+            time.sleep(min(1.0, HEARTBEAT_INTERVAL))
+            if time.monotonic() - self.last_sent >= HEARTBEAT_INTERVAL:
+                self.send_heartbeat()
+            if self.turn_timeout:
+                self.check_turn()
+            if (self.resumed and not self.player_names and
+                    time.monotonic() - self.created > JOIN_TIMEOUT):
+                log.warning("resume_abandoned", table=self.table_id)
+                self.close()
+
+    def check_turn(self):
+        """Play or end a turn nobody has acted on for turn_timeout seconds"""
+        now = time.monotonic()
+        with self.lock:
+            if self.rules.version != self._turn_version:
+                self._turn_version = self.rules.version
+                self._turn_started = now
+                return
+            if (now - self._turn_started < self.turn_timeout or not self.clients or
+                    self.rules.board.state in ["waiting", "game_over"]):
+                return
+            name = self.rules.get_current_player_name()
+            if self.auto_player is None:
+                log.warning("turn_timeout", table=self.table_id, player=name, closing=True)
+                for conn in list(self.clients):
+                    self._drop(conn)
+                return
+            # Play the whole turn, not one step of it per timeout
+            board = self.rules.board
+            seat, state = board.current_player_index, board.state
+            actions = []
+            while board.current_player_index == seat and board.state == state:
+                action, row, col = self.auto_player.choose(self.rules, name)
+                if not self.rules.handle_action(name, action, row, col):
+                    break
+                actions.append(action)
+            log.warning("turn_timeout", table=self.table_id, player=name, auto_actions=actions)
+        if actions:
+            self.send_game_state_to_all()
+
+    def play(self, conn, name):
+        """Run a seated player's connection until they leave"""
+        joined = time.monotonic()
+        try:
+            if self.resumed:
+                # Back after a restart, the game goes on from where it was
+                with self.lock:
+                    conn.send(self.rules.get_encoded_state_for_player(name))
+            else:
+                # Wait for all players to join
+                deadline = time.monotonic() + JOIN_TIMEOUT
+                while len(self.clients) < self.max_players:
+                    if conn not in self.clients or time.monotonic() > deadline:
+                        return
+                    time.sleep(0.1)
+
+                # Start game when all players are connected
+                self.start_when_full()
+
+            # Handle client messages; a live client pings at least every HEARTBEAT_INTERVAL
+            conn.settimeout(self.idle_timeout)
+            bucket = TokenBucket(*self.rate_limit) if self.rate_limit else None
+            pings = TokenBucket(*PING_RATE)
+            # Pings sent while waiting for the table are read in one burst at the start
+            backlog = int((time.monotonic() - joined) / HEARTBEAT_INTERVAL) + 1
+            buffer = ""
+            rejected = 0
+            while rejected < MAX_REJECTIONS:
+                try:
+                    # Reading at most MAX_FRAME bytes and refusing longer messages
+                    # bounds the work decode_messages does per recv
+                    data = conn.recv(MAX_FRAME).decode()
+                    if not data:
+                        break
+
+                    messages, buffer = decode_messages(buffer + data)
+                    if len(buffer) >= MAX_FRAME:
+                        self.reject("frame_too_large", name)
+                        break
+                    for action_data in messages:
+                        if not isinstance(action_data, dict):
+                            self.reject("invalid_message", name)
+                            rejected += 1
+                        elif action_data.get("action") == "ping":
+                            # Charged to their own bucket, so heartbeats never crowd out moves
+                            if backlog:
+                                backlog -= 1
+                            elif not pings.allow():
+                                self.reject("ping_rate", name)
+                                rejected += 1
+                        elif not self.admit(bucket, name):
+                            rejected += 1
+                        else:
+                            self.handle_message(conn, name, action_data)
+
+                except json.JSONDecodeError:
+                    self.reject("invalid_json", name)
+                    rejected += 1
+                    buffer = ""
+                except socket.timeout:
+                    log.event("idle_timeout", table=self.table_id, player=name)
+                    break
                 except Exception as e:
-                    print(f"Error sending state to {name}: {e}")
-                    if conn in clients:
-                        clients.remove(conn)
+                    log.error("client_error", table=self.table_id, player=name, error=str(e))
+                    break
+            else:
+                log.warning("too_many_rejections", table=self.table_id, player=name)
+
+        except Exception as e:
+            log.error("client_error", table=self.table_id, player=name, error=str(e))
+        finally:
+            self.remove_player(conn, name)
+
+    def admit(self, bucket, name):
+        """Charge a message to the connection's and the table's rate limit"""
+        if bucket is not None and not bucket.allow():
+            self.reject("connection_rate", name)
+            return False
+        if self.bucket is not None:
+            with self.lock:
+                allowed = self.bucket.allow()
+            if not allowed:
+                self.reject("table_rate", name)
+                return False
+        return True
+
+    def reject(self, reason, name, event="message_rejected", **fields):
+        """Count a rejected message and log a sample of them"""
+        self.rejections[reason] += 1
+        REJECTIONS[reason] += 1
+        log.warning(event, table=self.table_id, player=name, reason=reason, **fields)
+
+    def handle_message(self, conn, name, action_data):
+        """Apply one decoded client message"""
+        action = action_data.get("action")
+        success = False
+        
+        # Handle different action types
+        if action == "ping":
+            return  # Only keeps the connection alive
+        elif action == "get_state":
+            # Resend the state, or "not modified" if the client's version is current
+            with self.lock:
+                reply = self.rules.get_state_reply(name, action_data.get("version"))
+            conn.send(reply)
+            return
+        elif action in ACTIONS:
+            started = time.perf_counter()
+            with self.lock:
+                success = self.rules.handle_action(
+                    name, action, action_data.get("row"), action_data.get("col")
+                )
+        else:
+            self.reject("unknown_action", name, "unknown_action", action=str(action)[:32])
+            return
+        
+        if success:
+            # Broadcast updated game state to all players
+            self.send_game_state_to_all()
+            log.event("action", table=self.table_id, player=name, action=action,
+                      version=self.rules.version,
+                      latency_us=round((time.perf_counter() - started) * 1e6))
+        else:
+            self.reject("failed_action", name, "action_failed", action=action)
+
+    def remove_player(self, conn, name):
+        """Close a player's connection and free the seat"""
+        conn.close()
+        with self.lock:
+            if conn in self.clients:
+                self.clients.remove(conn)
+            if name in self.player_names:
+                self.player_names.remove(name)
+            empty = not self.player_names
+        log.event("disconnected", table=self.table_id, player=name)
+        if empty:
+            self.close()
+
+    def close(self):
+        """Mark the table as finished and tell its owner, once"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        if self.on_close:
+            self.on_close(self)
+
+# The table of a standalone server, which runs one game at a time
+table = None
+replays = None
+leaderboard = None
+state_slots = None
+restored_slots = []  # Slots of games found in the state file at startup, not resumed yet
+
+def new_table():
+    """Open the standalone server's table for the next game"""
+    global table
+    if restored_slots:
+        slot = restored_slots.pop(0)
+        table = GameTable(rules=state_slots.load(slot))
+        table.resume()
+        table.saver = state_slots.attach(table.rules, slot)
+        log.event("game_resumed", table=table.table_id, slot=slot,
+                  players=[player.name for player in table.rules.board.players])
+    else:
+        table = GameTable()
+        table.saver = state_slots.attach(table.rules) if state_slots else None
+    table.on_close = reclaim_table
+    table.recorder = replays.record(table.rules) if replays and not table.resumed else None
+    if leaderboard:
+        leaderboard.attach(table.rules)
+    return table
+
+def reclaim_table(closed):
+    """Replace a table everyone has left with a fresh one"""
+    if closed.recorder and closed.recorder.names:
+        # Keep unfinished games too, they are flagged as such in the archive
+        closed.recorder.finish()
+    if closed.saver:
+        # Everyone left, so there is nobody to resume the game for
+        closed.saver.release()
+    if closed is table:
+        new_table()
+
+new_table()
+
+def send_game_state_to_all():
+    """Send updated game state to all connected clients"""
+    table.send_game_state_to_all()
 
 def handle_client(conn, addr):
     global MAX_PLAYERS
     name = ""
     try:
-        with lock:
-            is_first = len(clients) == 0
+        # Do not let a client that never finishes registering hold the thread
+        conn.settimeout(JOIN_TIMEOUT)
+        with table.lock:
+            is_first = len(table.clients) == 0 and not table.resumed
 
         # Handle player count selection (only for first player)
         if is_first:
             conn.send("choose_players".encode())
             try:
                 MAX_PLAYERS = int(conn.recv(1024).decode())
-                print(f"Game set for {MAX_PLAYERS} players")
+                table.max_players = MAX_PLAYERS
+                log.event("table_size", table=table.table_id, players=MAX_PLAYERS)
             except ValueError:
-                print("Error: Invalid player count")
+                log.warning("registration_failed", reason="invalid player count", addr=str(addr))
                 conn.close()
                 return
         else:
@@ -55,113 +400,78 @@ def handle_client(conn, addr):
 
         # Get player name
         name = conn.recv(1024).decode().strip()
-        if not name or name in player_names:
-            print(f"Error: Invalid or duplicate player name: {name}")
+        if not table.add_player(conn, name):
+            log.warning("registration_failed", reason="invalid or duplicate name", player=name)
             conn.close()
             return
 
-        # Add player to game
-        with lock:
-            player_names.append(name)
-            rules.add_player(name)
-            clients.append(conn)
+    except Exception as e:
+        log.error("client_error", player=name, error=str(e))
+        conn.close()
+        return
 
-        print(f"{name} connected from {addr}")
+    log.event("connected", table=table.table_id, player=name, addr=str(addr))
+    table.play(conn, name)
 
-        # Wait for all players to join
-        while len(clients) < MAX_PLAYERS:
-            time.sleep(0.1)
+def default_addresses():
+    """TCP for remote players, plus a Unix socket for clients on this machine"""
+    addresses = [f"tcp://{HOST}:{PORT}"]
+    if unix_sockets_supported():
+        addresses.append(f"unix://{default_unix_path(PORT)}")
+    return addresses
 
-        # Start game when all players are connected
-        if len(clients) == MAX_PLAYERS and len(player_names) == MAX_PLAYERS:
-            print("All players connected, starting game...")
-            rules.start_game()
-            send_game_state_to_all()
+def serve(listener):
+    """Accept players on a listener until it is closed"""
+    while True:
+        try:
+            conn, addr = listener.accept()
+        except OSError:
+            break
+        threading.Thread(target=handle_client, args=(conn, addr), daemon=True).start()
 
-        # Handle client messages
-        while True:
-            try:
-                data = conn.recv(4096).decode().strip()
-                if not data:
-                    break
-                    
-                action_data = json.loads(data)
-                action = action_data.get("action")
-                
-                success = False
-                
-                # Handle different action types
-                if action == "select_initial_card":
-                    row = action_data.get("row")
-                    col = action_data.get("col")
-                    success = rules.handle_initial_card_selection(name, row, col)
-                
-                elif action == "draw_from_deck":
-                    success = rules.handle_draw_pile_action(name)
-                
-                elif action == "draw_from_discard":
-                    success = rules.handle_discard_pile_action(name)
-                
-                elif action == "keep_card":
-                    success = rules.handle_keep_card_action(name)
-                
-                elif action == "discard_card":
-                    success = rules.handle_discard_drawn_card_action(name)
-                
-                elif action == "swap_card":
-                    row = action_data.get("row")
-                    col = action_data.get("col")
-                    success = rules.handle_card_swap(name, row, col)
-                
-                elif action == "flip_card":
-                    row = action_data.get("row")
-                    col = action_data.get("col")
-                    success = rules.handle_card_flip(name, row, col)
-                
-                elif action == "start_new_round":
-                    success = rules.start_new_round()
-                
-                else:
-                    print(f"Unknown action from {name}: {action}")
-                
-                if success:
-                    # Broadcast updated game state to all players
-                    send_game_state_to_all()
-                else:
-                    print(f"Action failed for {name}: {action}")
-                    
-            except json.JSONDecodeError:
-                print(f"Invalid JSON from {name}")
-            except Exception as e:
-                print(f"Error handling action from {name}: {e}")
-                break
+def start_admin(path=ADMIN_PATH):
+    """Open this process's admin socket for profiling (see net/admin.py)"""
+    admin = AdminServer(rules_handlers() + [(GameTable, "send_game_state_to_all")], path)
+    if admin.start():
+        print(f"Admin socket on {admin.path}")
+    return admin
 
-    except Exception as e:
-        print(f"Error with client {name}: {e}")
-    finally:
-        conn.close()
-        with lock:
-            if conn in clients:
-                clients.remove(conn)
-            if name in player_names:
-                player_names.remove(name)
-        print(f"{name} disconnected")
-
-def start_server():
+def start_server(addresses=None):
     """Start the game server"""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind((HOST, PORT))
-        s.listen()
-        print(f"Skyjo server started on {HOST}:{PORT}")
-        print("Waiting for players to connect...")
+    global replays, leaderboard, state_slots
+    setup_logging()
+    replays = ReplayWriter(REPLAY_PATH) if REPLAY_PATH else None
+    leaderboard = Leaderboard(LEADERBOARD_PATH) if LEADERBOARD_PATH else None
+    if STATE_PATH:
+        state_slots = StateSlots(STATE_PATH)
+        restored_slots[:] = state_slots.live()
+    new_table()
+    admin = start_admin()
+    listeners = [listen(address) for address in addresses or default_addresses()]
+    for listener in listeners:
+        print(f"Skyjo server started on {listener.address}")
+    print("Waiting for players to connect...")
 
-        try:
-            while True:
-                conn, addr = s.accept()
-                threading.Thread(target=handle_client, args=(conn, addr), daemon=True).start()
-        except KeyboardInterrupt:
-            print("\nServer shutting down...")
+    try:
+        for listener in listeners[1:]:
+            threading.Thread(target=serve, args=(listener,), daemon=True).start()
+        serve(listeners[0])
+    except KeyboardInterrupt:
+        print("\nServer shutting down...")
+    finally:
+        for listener in listeners:
+            listener.close()
+        admin.close()
+        if state_slots:
+            # Unfinished games stay in their slots for the next start
+            state_slots.close()
+        if replays:
+            # Keep unfinished games too, they are flagged as such in the archive
+            if table.recorder and table.recorder.names:
+                table.recorder.finish()
+            replays.close()
+        if leaderboard:
+            leaderboard.close()
 
 if __name__ == "__main__":
     start_server()
@@ -0,0 +1,235 @@
+import collections
+import os
+import socket
+import tempfile
+import threading
+
+# Addresses look like "tcp://host:port", "unix:///path/to/socket" or "loopback://name"
+DEFAULT_PORT = 12345
+
+
+def default_unix_path(port=DEFAULT_PORT):
+    """Unix socket the server listens on next to its TCP port"""
+    return os.path.join(tempfile.gettempdir(), f"skyjo-{port}.sock")
+
+
+def unix_sockets_supported():
+    return hasattr(socket, "AF_UNIX")
+
+
+class SocketTransport:
+    """Byte stream over a connected TCP or Unix domain socket"""
+
+    def __init__(self, sock, peer=None):
+        self.sock = sock
+        self.peer = peer
+        if sock.family != getattr(socket, "AF_UNIX", None):
+            # Small game messages should not wait for Nagle's algorithm
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, data):
+        return self.sock.send(data)
+
+    def sendall(self, data):
+        self.sock.sendall(data)
+
+    def recv(self, bufsize):
+        return self.sock.recv(bufsize)
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def close(self):
+        try:
+            # Wakes up a thread blocked in recv on this socket
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # Not connected or already closed
+        self.sock.close()
+
+    def release(self):
+        """Close our descriptor but leave the connection up, for one passed to another process"""
+        self.sock.close()
+
+
+class LoopbackTransport:
+    """One end of an in-memory byte stream between two threads.
+
+    Behaves like a connected socket: sends never block, recv blocks until
+    data arrives and returns b"" once the other end is closed.
+    """
+
+    def __init__(self, peer=None):
+        self.peer = peer
+        self.other = None  # The LoopbackTransport at the other end
+        self._chunks = collections.deque()
+        self._ready = threading.Condition(threading.Lock())
+        self._eof = False
+        self._closed = False
+        self._timeout = None
+
+    @classmethod
+    def pair(cls, peer="loopback"):
+        """Create two connected ends"""
+        a = cls(peer)
+        b = cls(peer)
+        a.other = b
+        b.other = a
+        return a, b
+
+    def _deliver(self, data):
+        with self._ready:
+            if data is None:
+                self._eof = True
+            else:
+                self._chunks.append(data)
+            self._ready.notify()
+
+    def send(self, data):
+        if self._closed or self.other._closed:
+            raise BrokenPipeError("loopback connection closed")
+        self.other._deliver(bytes(data))
+        return len(data)
+
+    def sendall(self, data):
+        self.send(data)
+
+    def recv(self, bufsize):
+        with self._ready:
+            if not self._chunks and not self._eof:
+                if not self._ready.wait_for(lambda: self._chunks or self._eof, self._timeout):
+                    raise socket.timeout("timed out")
+            if not self._chunks:
+                return b""
+            data = self._chunks.popleft()
+            # Coalesce queued chunks like a stream socket would
+            while self._chunks and len(data) < bufsize:
+                data += self._chunks.popleft()
+            if len(data) > bufsize:
+                self._chunks.appendleft(data[bufsize:])
+                data = data[:bufsize]
+            return data
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._deliver(None)
+            self.other._deliver(None)
+
+
+class SocketListener:
+    """Accepts connections on a TCP or Unix domain socket"""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+
+    def accept(self):
+        conn, addr = self.sock.accept()
+        return SocketTransport(conn, addr or self.address), addr or self.address
+
+    def close(self):
+        self.sock.close()
+        if self.address.startswith("unix://"):
+            path = self.address[len("unix://"):]
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class LoopbackListener:
+    """Accepts in-process connections made with connect("loopback://name")"""
+
+    def __init__(self, address):
+        self.address = address
+        self._pending = collections.deque()
+        self._ready = threading.Condition()
+        self._closed = False
+
+    def connect(self):
+        client_end, server_end = LoopbackTransport.pair(self.address)
+        with self._ready:
+            if self._closed:
+                raise ConnectionRefusedError(self.address)
+            self._pending.append(server_end)
+            self._ready.notify()
+        return client_end
+
+    def accept(self):
+        with self._ready:
+            self._ready.wait_for(lambda: self._pending or self._closed)
+            if not self._pending:
+                raise OSError("listener closed")
+            return self._pending.popleft(), self.address
+
+    def close(self):
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+        _loopback_listeners.pop(self.address, None)
+
+
+_loopback_listeners = {}
+
+
+def _split(address):
+    scheme, sep, rest = address.partition("://")
+    if not sep:
+        raise ValueError(f"Invalid address: {address}")
+    return scheme, rest
+
+
+def _host_port(rest):
+    host, _, port = rest.rpartition(":")
+    return host or "localhost", int(port)
+
+
+def listen(address):
+    """Open a listener for a tcp://, unix:// or loopback:// address"""
+    scheme, rest = _split(address)
+    if scheme == "tcp":
+        host, port = _host_port(rest)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen()
+        # Port 0 picks a free port; report the real one
+        return SocketListener(sock, f"tcp://{host}:{sock.getsockname()[1]}")
+    if scheme == "unix":
+        if os.path.exists(rest):
+            os.remove(rest)  # Left behind by a server that did not shut down cleanly
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(rest)
+        sock.listen()
+        return SocketListener(sock, address)
+    if scheme == "loopback":
+        listener = LoopbackListener(address)
+        _loopback_listeners[address] = listener
+        return listener
+    raise ValueError(f"Unknown transport: {scheme}")
+
+
+def connect(address, timeout=None):
+    """Connect to a tcp://, unix:// or loopback:// address"""
+    scheme, rest = _split(address)
+    if scheme == "tcp":
+        sock = socket.create_connection(_host_port(rest), timeout)
+        sock.settimeout(None)
+        return SocketTransport(sock, address)
+    if scheme == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(rest)
+        sock.settimeout(None)
+        return SocketTransport(sock, address)
+    if scheme == "loopback":
+        listener = _loopback_listeners.get(address)
+        if listener is None:
+            raise ConnectionRefusedError(address)
+        return listener.connect()
+    raise ValueError(f"Unknown transport: {scheme}")
@@ -1,18 +1,95 @@
 import pygame
+from ui.text import render_text
+
+BUTTON_COLOR = (120, 120, 255)
+LABEL_COLOR = (255, 255, 255)
+LABEL_SIZE = 24
 
 class Button:
     def __init__(self, x, y, width, height, text, callback):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.callback = callback
-        self.font = pygame.font.SysFont(None, 24)
-        self.color = (120, 120, 255)
+        self.color = BUTTON_COLOR
+        self.hovered = False
+        self.pressed = False
+        self._faces = None  # State -> pre-rendered button, made on first draw
+
+    @property
+    def state(self):
+        return "pressed" if self.pressed else ("hover" if self.hovered else "normal")
+
+    def _render_faces(self):
+        """The button in each state, label included, so drawing is a single blit"""
+        label = render_text(self.text, LABEL_SIZE, LABEL_COLOR)
+        r, g, b = self.color
+        colors = {
+            "normal": self.color,
+            "hover": (min(255, r + 30), min(255, g + 30), min(255, b + 30)),
+            "pressed": (r * 3 // 4, g * 3 // 4, b * 3 // 4),
+        }
+        faces = {}
+        for state, color in colors.items():
+            face = pygame.Surface(self.rect.size)
+            if pygame.display.get_surface() is not None:
+                face = face.convert()
+            face.fill(color)
+            face.blit(label, label.get_rect(center=face.get_rect().center))
+            faces[state] = face
+        return faces
 
     def draw(self, surface):
-        pygame.draw.rect(surface, self.color, self.rect)
-        text_surface = self.font.render(self.text, True, (255, 255, 255))
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        surface.blit(text_surface, text_rect)
+        if self._faces is None:
+            self._faces = self._render_faces()
+        surface.blit(self._faces[self.state], self.rect)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
+
+class WidgetLayer:
+    """The widgets on screen, kept until the screen they belong to changes.
+
+    show() builds new widgets only when its key differs from the last one,
+    e.g. on a phase change or a resize. handle_event() tracks hover and
+    press states and runs the callback of a clicked widget.
+    """
+
+    def __init__(self):
+        self.widgets = []
+        self.key = None
+
+    def show(self, key, build, *args):
+        """The widgets for key, made by build(*args) if key is not the one shown"""
+        if key != self.key:
+            self.key = key
+            self.widgets = build(*args)
+            if self.widgets and pygame.mouse.get_focused():
+                position = pygame.mouse.get_pos()
+                for widget in self.widgets:
+                    widget.hovered = widget.rect.collidepoint(position)
+        return self.widgets
+
+    def handle_event(self, event):
+        """Returns (consumed, changed): whether a widget took the click and whether any widget looks different"""
+        if event.type == pygame.MOUSEMOTION:
+            changed = False
+            for widget in self.widgets:
+                hovered = widget.rect.collidepoint(event.pos)
+                if hovered != widget.hovered:
+                    widget.hovered = hovered
+                    changed = True
+            return False, changed
+        if event.type == pygame.MOUSEBUTTONUP:
+            changed = False
+            for widget in self.widgets:
+                if widget.pressed:
+                    widget.pressed = False
+                    changed = True
+            return False, changed
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            for widget in self.widgets:
+                if widget.rect.collidepoint(event.pos):
+                    widget.pressed = True
+                    widget.callback()
+                    return True, True
+        return False, False
@@ -0,0 +1,61 @@
+import collections
+import pygame
+
+CARD_VALUES = ["-2", "-1", "0"] + [str(i) for i in range(1, 13)]
+SCALE_CACHE_SIZE = 4  # Card sizes kept; a window rarely needs more than two at once
+
+class CardImages(dict):
+    """Card surfaces by value ("-2" to "12", and "back"), all of one size.
+
+    The surfaces are subsurfaces of one atlas surface, converted to the
+    display format when a display exists so blits need no conversion.
+    scaled() returns the same cards at another size, built once from the
+    full-size sources and kept in a small cache shared by all sizes.
+    """
+
+    def __init__(self, sources, width, height, base_size=None, cache=None):
+        super().__init__()
+        self.sources = sources  # Value -> full resolution image as loaded
+        self.width = width
+        self.height = height
+        self.base_size = base_size or (width, height)  # Size at scale 1
+        self.cache = collections.OrderedDict() if cache is None else cache
+        self.cache[width, height] = self
+        self._build()
+
+    def _build(self):
+        if not self.sources:
+            return
+        atlas = pygame.Surface((self.width * len(self.sources), self.height), pygame.SRCALPHA)
+        for i, (value, source) in enumerate(self.sources.items()):
+            atlas.blit(pygame.transform.smoothscale(source, (self.width, self.height)), (i * self.width, 0))
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        self.atlas = atlas
+        for i, value in enumerate(self.sources):
+            self[value] = atlas.subsurface((i * self.width, 0, self.width, self.height))
+
+    def scaled(self, scale):
+        """The cards at scale times their size at scale 1"""
+        size = (max(1, round(self.base_size[0] * scale)), max(1, round(self.base_size[1] * scale)))
+        if size == (self.width, self.height):
+            return self
+        images = self.cache.get(size)
+        if images is None:
+            images = CardImages(self.sources, *size, self.base_size, self.cache)
+            if len(self.cache) > SCALE_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(size)
+        return images
+
+def load_cards(path, width, height):
+    """Load every card image once; missing ones are drawn as plain rectangles"""
+    sources = {}
+    for val in CARD_VALUES + ["back"]:
+        name = f"card_{val}" if val != "back" else "card_back"
+        try:
+            sources[val] = pygame.image.load(f"{path}/{name}.png")
+        except (pygame.error, FileNotFoundError):
+            print(f"[WARNING] Card {val} not found!")
+    return CardImages(sources, width, height)
@@ -0,0 +1,157 @@
+import functools
+import pygame
+
+# Constants
+CARD_WIDTH = 60
+CARD_HEIGHT = 90
+CARD_MARGIN = 5
+GRID_ROWS = 3
+GRID_COLS = 4
+
+PANEL_PADDING = 15
+PANEL_HEADER = 50  # Space above the grid for name and score
+GRID_TOP = 120
+PANEL_SPACING = {2: 50, 3: 30, 4: 20}  # Between panels, by boards per row
+BOARDS_PER_ROW = 4  # More boards (spectated tables) wrap into further rows
+ROW_SPACING = 20
+PILES_TOP = 180  # Distance of the piles from the bottom of the window
+MIN_SCALE = 0.25
+
+BUTTON_WIDTH = 120
+BUTTON_HEIGHT = 35
+BUTTON_SPACING = 10
+BUTTON_LEFT = 50
+
+def card_size(scale=1.0):
+    """Card width and height in a grid drawn at scale, as CardImages.scaled(scale) has them"""
+    return max(1, round(CARD_WIDTH * scale)), max(1, round(CARD_HEIGHT * scale))
+
+def card_margin(scale=1.0):
+    return round(CARD_MARGIN * scale)
+
+def grid_size(scale=1.0):
+    """Width and height of a 3x4 card grid"""
+    width, height = card_size(scale)
+    margin = card_margin(scale)
+    return (GRID_COLS * (width + margin) - margin,
+            GRID_ROWS * (height + margin) - margin)
+
+def highlight_rect(x, y, scale=1.0):
+    """Background of the panel of the grid at (x, y) while it is that player's turn"""
+    grid_width, grid_height = grid_size(scale)
+    return pygame.Rect(x - PANEL_PADDING, y - PANEL_HEADER, grid_width + 2 * PANEL_PADDING,
+                       grid_height + 2 * PANEL_PADDING + PANEL_HEADER)
+
+def panel_rect(x, y, scale=1.0):
+    """Everything a player panel may draw on, including the glow"""
+    return highlight_rect(x, y, scale).inflate(8, 8)
+
+def card_position(x, y, row, col, scale=1.0):
+    width, height = card_size(scale)
+    margin = card_margin(scale)
+    return x + col * (width + margin), y + row * (height + margin)
+
+def held_card_rect(screen_size):
+    """The held card and its label"""
+    return pygame.Rect(screen_size[0] - CARD_WIDTH - 20, 10, CARD_WIDTH + 20, CARD_HEIGHT + 25)
+
+def pile_positions(screen_size):
+    """Top-left corners of the deck and the discard pile"""
+    screen_width, screen_height = screen_size
+
+    # Position center area below the player grids
+    center_x = screen_width // 2
+    center_y = screen_height - PILES_TOP  # Moved up to give more space for buttons
+    return (center_x - CARD_WIDTH - 20, center_y), (center_x + 20, center_y)
+
+def center_rect(screen_size):
+    """Both piles with their labels"""
+    (deck_x, deck_y), (discard_x, _) = pile_positions(screen_size)
+    return pygame.Rect(deck_x, deck_y - 20, discard_x + CARD_WIDTH + 40 - deck_x, CARD_HEIGHT + 45)
+
+@functools.lru_cache(maxsize=8)
+def get_layout(screen_size, num_players):
+    """The layout for a window size and number of boards, computed once"""
+    return Layout(tuple(screen_size), num_players)
+
+class Layout:
+    """Where every board, card and button goes in a window of one size.
+
+    Boards sit in rows of up to BOARDS_PER_ROW, centred, with cards and
+    spacing shrunk to fit the width (and the height, with several rows).
+    Since all boards share one card size and pitch, card_at() finds the
+    card under a point with a few divisions.
+    """
+
+    def __init__(self, screen_size, num_players):
+        self.screen_size = screen_size
+        self.num_players = num_players
+        screen_width, screen_height = screen_size
+        count = max(num_players, 2)
+        per_row = min(count, BOARDS_PER_ROW)
+        rows = -(-count // per_row)
+        spacing = PANEL_SPACING.get(per_row, PANEL_SPACING[BOARDS_PER_ROW])
+
+        # Cards and spacing shrink when the boards do not fit
+        grid_width, grid_height = grid_size()
+        total_width = per_row * (grid_width + 2 * PANEL_PADDING) + (per_row - 1) * spacing
+        scale = 1.0
+        if total_width > screen_width - 40:
+            available = screen_width - 40 - per_row * 2 * PANEL_PADDING
+            scale = available / (per_row * grid_width + (per_row - 1) * spacing)
+        if rows > 1:
+            frame = PANEL_HEADER + 2 * PANEL_PADDING + ROW_SPACING
+            # Down to the labels above the piles
+            available = screen_height - PILES_TOP - 30 - GRID_TOP - (rows - 1) * frame - PANEL_PADDING - 10
+            scale = min(scale, available / (rows * grid_height))
+        scale = max(MIN_SCALE, scale)
+        if scale < 1.0:
+            spacing = int(spacing * scale)
+
+        self.scale = scale
+        self.per_row = per_row
+        self.card_width, self.card_height = card_size(scale)
+        self.card_margin = card_margin(scale)
+        self.grid_width, self.grid_height = grid_size(scale)
+        row_width = per_row * (self.grid_width + 2 * PANEL_PADDING) + (per_row - 1) * spacing
+        self.left = (screen_width - row_width) // 2
+        self.step_x = self.grid_width + 2 * PANEL_PADDING + spacing
+        self.step_y = self.grid_height + 2 * PANEL_PADDING + PANEL_HEADER + ROW_SPACING
+        self.origins = [(self.left + (i % per_row) * self.step_x, GRID_TOP + (i // per_row) * self.step_y)
+                        for i in range(count)]
+        self.panels = [panel_rect(x, y, scale) for x, y in self.origins]
+
+        self.held_card = held_card_rect(screen_size)
+        self.piles = pile_positions(screen_size)
+        self.center = center_rect(screen_size)
+        button_y = screen_height - BUTTON_HEIGHT - 20
+        self.buttons = [pygame.Rect(BUTTON_LEFT + i * (BUTTON_WIDTH + BUTTON_SPACING), button_y,
+                                    BUTTON_WIDTH, BUTTON_HEIGHT) for i in range(2)]
+        self.wide_button = pygame.Rect(BUTTON_LEFT, button_y, 2 * BUTTON_WIDTH, BUTTON_HEIGHT)
+
+    def card_position(self, player, row, col):
+        x, y = self.origins[player]
+        return (x + col * (self.card_width + self.card_margin),
+                y + row * (self.card_height + self.card_margin))
+
+    def card_rect(self, player, row, col):
+        return pygame.Rect(self.card_position(player, row, col), (self.card_width, self.card_height))
+
+    def card_at(self, pos):
+        """(player, row, col) of the card slot under pos, or None"""
+        x, y = pos
+        board_col = (x - self.left) // self.step_x
+        board_row = (y - GRID_TOP) // self.step_y
+        if not 0 <= board_col < self.per_row or board_row < 0:
+            return None
+        player = board_row * self.per_row + board_col
+        if player >= len(self.origins):
+            return None
+        origin_x, origin_y = self.origins[player]
+        if x < origin_x or y < origin_y:
+            return None
+        col, offset_x = divmod(x - origin_x, self.card_width + self.card_margin)
+        row, offset_y = divmod(y - origin_y, self.card_height + self.card_margin)
+        if col >= GRID_COLS or row >= GRID_ROWS or offset_x >= self.card_width or offset_y >= self.card_height:
+            return None  # Padding or the gap between two cards
+        return player, row, col
@@ -0,0 +1,168 @@
+import pygame
+from ui.layout import GRID_COLS, GRID_ROWS, get_layout
+from ui.text import render_text
+from ui.screen import (
+    DARK_GREEN, WHITE, YELLOW,
+    current_player_name, draw_card_cell, draw_center_area, draw_game_message, draw_game_over_screen,
+    draw_game_status, draw_held_card, draw_player_panel, game_status_lines, grid_cell
+)
+
+class Renderer:
+    """Draws the game window, repainting only the regions whose content changed.
+
+    Each frame the window is described as regions in z-order: a rect, a
+    signature of everything the region shows and a draw call. A region
+    whose signature or rect differs from the last frame is dirty. Dirty
+    rects are repainted under a clip rect: background first, then every
+    region overlapping them, so neighbours stay intact. Only those rects
+    are pushed to the display.
+    """
+
+    def __init__(self, screen, card_images):
+        self.screen = screen
+        self.card_images = card_images
+        self.drawn = {}  # Region key -> (rect, signature) on screen
+        self.mode = None
+        self.layout = None  # Layout of the game on screen, for clicks
+        self.last_update = []  # Rects pushed to the display by the last frame
+
+    def invalidate(self):
+        """Repaint the whole window on the next frame, e.g. after a resize"""
+        self.mode = None
+
+    def draw(self, game_state, player_name, buttons=()):
+        """Bring the window up to date with the game state and the buttons"""
+        if not game_state:
+            mode = ("waiting", self.screen.get_size())
+        elif game_state.get('board_info', {}).get('state') == 'game_over':
+            mode = ("game_over", self.screen.get_size(), game_state.get('version'))
+        else:
+            mode = ("game", self.screen.get_size())
+
+        if mode[0] != "game":
+            self.layout = None
+            self.drawn = {}
+            if mode != self.mode:
+                self.mode = mode
+                if mode[0] == "waiting":
+                    self._draw_waiting()
+                else:
+                    draw_game_over_screen(self.screen, game_state)
+                pygame.display.flip()
+                self.last_update = [self.screen.get_rect()]
+            else:
+                self.last_update = []
+            return self.last_update
+
+        regions = self._regions(game_state, player_name, buttons)
+        if mode != self.mode:
+            self.mode = mode
+            dirty = [self.screen.get_rect()]
+        else:
+            dirty = self._dirty_rects(regions)
+        for area in dirty:
+            self._repaint(area, regions)
+        self.drawn = {key: (rect, signature) for key, rect, signature, _ in regions}
+
+        if dirty == [self.screen.get_rect()]:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+        self.last_update = dirty
+        return dirty
+
+    def _draw_waiting(self):
+        self.screen.fill(DARK_GREEN)
+        text = render_text("Waiting for game to start...", 36, WHITE)
+        self.screen.blit(text, (self.screen.get_width() // 2 - text.get_width() // 2, self.screen.get_height() // 2))
+
+    def _dirty_rects(self, regions):
+        dirty = []
+        keys = set()
+        for key, rect, signature, _ in regions:
+            keys.add(key)
+            previous = self.drawn.get(key)
+            if previous == (rect, signature):
+                continue
+            dirty.append(rect)
+            if previous is not None and previous[0] != rect:
+                dirty.append(previous[0])  # Clear where it used to be
+        for key, (rect, _) in self.drawn.items():
+            if key not in keys:
+                dirty.append(rect)  # Gone, e.g. a button after our turn
+        return _merge(dirty)
+
+    def _repaint(self, area, regions):
+        screen = self.screen
+        screen.set_clip(area)
+        screen.fill(DARK_GREEN, area)
+        for _, rect, _, draw in regions:
+            if rect.colliderect(area):
+                draw[0](*draw[1:])
+        screen.set_clip(None)
+
+    def _regions(self, game_state, player_name, buttons):
+        """(key, rect, signature, draw call) of everything on screen, in z-order"""
+        screen = self.screen
+        size = screen.get_size()
+        regions = []
+        players_data = game_state.get('players', {})
+        turn_name = current_player_name(game_state)
+        layout = self.layout = get_layout(size, len(players_data))
+        scale = layout.scale
+        cards = self.card_images.scaled(scale)
+
+        for idx, (name, data) in enumerate(players_data.items()):
+            x, y = layout.origins[idx]
+            is_self = name == player_name
+            is_turn = name == turn_name
+            signature = (name, data.get("score", 0), data.get("total_score", 0), is_self, is_turn)
+            regions.append((("panel", idx), layout.panels[idx], signature,
+                            (draw_player_panel, screen, name, data, x, y, is_self, is_turn, scale)))
+            for row in range(GRID_ROWS):
+                for col in range(GRID_COLS):
+                    card_x, card_y = layout.card_position(idx, row, col)
+                    value, revealed = grid_cell(data, row, col)
+                    # Includes the 1px turn border around the card
+                    rect = pygame.Rect(card_x - 1, card_y - 1, cards.width + 2, cards.height + 2)
+                    regions.append((("card", idx, row, col), rect, (value, revealed, is_turn),
+                                    (draw_card_cell, screen, cards, value, revealed, card_x, card_y, is_turn)))
+
+        lines = game_status_lines(game_state)
+        status_rect = pygame.Rect(10, 10, 0, 0)
+        for i, (text, color) in enumerate(lines):
+            status_rect.union_ip(render_text(text, 24, color).get_rect(topleft=(10, 10 + 25 * i)))
+        regions.append(("status", status_rect, lines, (draw_game_status, screen, game_state)))
+
+        drawn_card = game_state.get('drawn_card')
+        regions.append(("held", layout.held_card, drawn_card,
+                        (draw_held_card, screen, game_state, self.card_images)))
+
+        piles = (game_state.get('deck_size', 0), game_state.get('top_discard'), game_state.get('discard_size', 0))
+        regions.append(("piles", layout.center, piles,
+                        (draw_center_area, screen, game_state, self.card_images)))
+
+        message = game_state.get('message', '')
+        message_rect = render_text(message, 24, YELLOW).get_rect(topleft=(10, size[1] - 30)) if message \
+            else pygame.Rect(10, size[1] - 30, 0, 0)
+        regions.append(("message", message_rect, message, (draw_game_message, screen, message)))
+
+        for i, button in enumerate(buttons):
+            regions.append((("button", i), button.rect, (button.text, button.state),
+                            (button.draw, screen)))
+        return regions
+
+def _merge(rects):
+    """Union overlapping rects so no pixel is repainted twice"""
+    merged = []
+    for rect in rects:
+        if not rect.width or not rect.height:
+            continue
+        rect = pygame.Rect(rect)
+        while True:
+            index = rect.collidelist(merged)
+            if index < 0:
+                break
+            rect.union_ip(merged.pop(index))
+        merged.append(rect)
+    return merged
@@ -0,0 +1,31 @@
+import functools
+import pygame
+
+TEXT_CACHE_SIZE = 512  # Rendered strings kept, enough for every label of a 4 player game
+
+_fonts = {}
+
+def get_font(size):
+    """The default font at a size, loaded only once"""
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[size] = pygame.font.SysFont(None, size)
+    return font
+
+def render_text(text, size, color):
+    """Antialiased text surface, cached by (text, size, color).
+
+    The surface is shared with every other caller, so only blit it.
+    """
+    return _render(text, size, tuple(color))
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _render(text, size, color):
+    return get_font(size).render(text, True, color)
+
+def clear_cache():
+    """Forget all fonts and rendered text, e.g. after pygame.quit()"""
+    _fonts.clear()
+    _render.cache_clear()